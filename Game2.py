@@ -1,26 +1,77 @@
 
 import sys
 import os
+import io
+import time
 import pygame
-import random
 import colorsys
 import sqlite3
-
-def resource_path(relative_path):
-    """ Get absolute path to resource, works for dev and for PyInstaller """
-    try:
-        base_path = sys._MEIPASS
-    except AttributeError:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+import threading
+import queue
+from collections import OrderedDict
+# Startup is timed from here to the first frame on screen (see STARTUP_BUDGET_MS);
+# importing pygame itself (which pulls in numpy) happens before and is not ours to speed up.
+LAUNCHED = time.perf_counter()
+from simulation import (WIDTH, HEIGHT, TICK_RATE, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_DOWN,
+                        RUN_FRAMES, COIN_FRAMES, player_width, player_height, stages, Simulation,
+                        CHUNK_WIDTH, STREAM_RADIUS, worlds)
+from replay import ReplayRecorder
+from levels import TEXTURE_PATH, overlay_surface, resource_path
+from assetpack import AssetPack
+from profiler import FrameProfiler
+from loading import AssetLoader
 
 pygame.init()
 
 # ---------------- Screen Setup ----------------
-WIDTH, HEIGHT = 1200, 600
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Shadow Chase")
 clock = pygame.time.Clock()
+# The simulation always advances at TICK_RATE; the display refreshes at
+# RENDER_FPS (0 = uncapped) and interpolates between the last two ticks.
+RENDER_FPS = int(os.environ.get("SHADOW_CHASE_FPS", "60"))
+TICK_MS = 1000 / TICK_RATE
+MAX_TICKS_PER_FRAME = 5  # beyond this the game slows down instead of spiralling
+# Save each run's seed, world and inputs here (overwritten per run); replay it with replay.py.
+RECORD_PATH = os.environ.get("SHADOW_CHASE_RECORD")
+# Frame-time profiler: F3 toggles it in game; the trace is written on exit.
+PROFILE = os.environ.get("SHADOW_CHASE_PROFILE") == "1"
+PROFILE_PATH = os.environ.get("SHADOW_CHASE_PROFILE_OUT", "frame_profile.csv")
+# Redraw only what moved and push it with display.update(rects); handy on
+# software-rendered or low-power displays. Full redraw + flip stays the default.
+DIRTY_RECTS = os.environ.get("SHADOW_CHASE_DIRTY_RECTS") == "1"
+# The start screen must be up this soon after LAUNCHED; bench.py flags runs that miss it.
+STARTUP_BUDGET_MS = 200
+startup_ms = None  # measured: LAUNCHED to the first frame on screen
+ready_ms = None  # measured: LAUNCHED to every queued asset installed
+# Release builds ship every asset pre-processed in one memory-mapped file
+# (built by assetpack.py). Without it, or with this set to "", the loose
+# files below are loaded and processed instead.
+ASSET_PACK = os.environ.get("SHADOW_CHASE_ASSET_PACK", resource_path("assets.pack"))
+asset_pack = AssetPack.open(ASSET_PACK) if ASSET_PACK else None
+
+
+def packed_image(name, size=None):
+    """``name`` from the asset pack if it was built at ``size``, else None."""
+    return asset_pack.image(name, size) if asset_pack else None
+
+
+# Everything below that reads a file is queued here and finishes while the
+# start screen is showing; SPACE starts a run only once it is all installed.
+loader = AssetLoader()
+
+
+def load_assets():
+    """Block until every queued asset is installed (for tools that skip the start screen)."""
+    global ready_ms
+    loader.wait()
+    if ready_ms is None:
+        ready_ms = (time.perf_counter() - LAUNCHED) * 1000
+
+# Play one of simulation.worlds (e.g. "tour", "long") with a scrolling camera instead of single screens.
+WORLD = os.environ.get("SHADOW_CHASE_WORLD")
+if WORLD and WORLD not in worlds:
+    sys.exit(f"SHADOW_CHASE_WORLD: unknown world {WORLD!r} (have {', '.join(worlds)})")
 
 # ---------------- Colors ----------------
 WHITE = (255, 255, 255)
@@ -28,493 +79,689 @@ GRAY = (100, 100, 100)  # Platforms
 BLACK = (0, 0, 0)
 
  # ---------------- Background ----------------
-background_img = pygame.image.load(resource_path("assets/background.png")).convert()
-background_img = pygame.transform.scale(background_img, (WIDTH, HEIGHT))
+background_img = None
+
+
+def load_background():
+    image = packed_image("background", (WIDTH, HEIGHT))
+    if image is None:
+        image = pygame.image.load(resource_path("assets/background.png"))
+        image = pygame.transform.scale(image, (WIDTH, HEIGHT))
+    return image
+
+
+def install_background(image):
+    global background_img
+    background_img = image.convert()
+
+
+loader.add(load_background, install_background)
 
 # ---------------- Platform Texture ----------------
-platform_texture = pygame.image.load(resource_path("assets/platform.png")).convert_alpha()
+platform_texture = None
+
+
+def load_platform_texture():
+    image = packed_image("platform")
+    if image is None:
+        image = pygame.image.load(resource_path(TEXTURE_PATH))
+    return image
+
+
+def install_platform_texture(image):
+    global platform_texture
+    platform_texture = image.convert_alpha()
+
+
+loader.add(load_platform_texture, install_platform_texture)
 
 # ---------------- Fonts ----------------
-title_font = pygame.font.SysFont("chiller", 96)
+# The default font ships with pygame and opens at once; looking up "chiller"
+# scans the system fonts, so the title appears when that lookup is done.
+title_font = None
 menu_font = pygame.font.SysFont(None, 36)
 small_font = pygame.font.SysFont(None, 28)
 
+
+def install_title_font(font):
+    global title_font
+    title_font = font
+
+
+loader.add(lambda: pygame.font.SysFont("chiller", 96), install_title_font)
+
+# ---------------- Text Cache ----------------
+text_cache = {}
+
+
+def render_text(font, text, color):
+    """Rendered ``text``, rasterized only the first time it is asked for."""
+    key = (font, text, color)
+    surface = text_cache.get(key)
+    if surface is None:
+        surface = text_cache[key] = font.render(text, True, color)
+    return surface
+
+
+class NumberLabel:
+    """A fixed prefix followed by a number, e.g. "Score: 12".
+
+    Digits are rendered once and the label is composed from those glyphs,
+    only when the value actually changes.
+    """
+
+    def __init__(self, font, prefix, color):
+        self.prefix = render_text(font, prefix, color)
+        self.glyphs = {digit: render_text(font, digit, color) for digit in "-0123456789"}
+        self.value = None
+        self.surface = None
+
+    def render(self, value):
+        if value != self.value:
+            glyphs = [self.glyphs[ch] for ch in str(value)]
+            width = self.prefix.get_width() + sum(glyph.get_width() for glyph in glyphs)
+            height = max([self.prefix.get_height()] + [glyph.get_height() for glyph in glyphs])
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            surface.blit(self.prefix, (0, 0))
+            x = self.prefix.get_width()
+            for glyph in glyphs:
+                surface.blit(glyph, (x, 0))
+                x += glyph.get_width()
+            self.value = value
+            self.surface = surface
+        return self.surface
+
+
+hud_score_label = NumberLabel(small_font, "Score: ", BLACK)
+hud_clones_label = NumberLabel(small_font, "Clones: ", BLACK)
+over_score_label = NumberLabel(menu_font, "Score: ", (200, 200, 200))
+over_highscore_label = NumberLabel(menu_font, "Highscore: ", (255, 255, 0))
+
  # ---------------- Character Sprites ----------------
-player_width, player_height = 60, 90
-run_frames = [pygame.image.load(resource_path(f"assets/character/block_0_{i}.png")).convert_alpha() for i in range(6)]
-jump_up = pygame.image.load(resource_path("assets/character/block_1_0.png")).convert_alpha()
-jump_down = pygame.image.load(resource_path("assets/character/block_1_1.png")).convert_alpha()
-
-run_frames = [pygame.transform.scale(f, (player_width, player_height)) for f in run_frames]
-jump_up = pygame.transform.scale(jump_up, (player_width, player_height))
-jump_down = pygame.transform.scale(jump_down, (player_width, player_height))
-
-# ---------------- Player Setup ----------------
-player_rect = pygame.Rect(150, HEIGHT - 150, player_width, player_height)
-player_vel_y = 0
-jump_velocity = -20
-gravity = 1
-player_speed = 7
-on_ground = False
-
-frame_index = 0
-frame_timer = 0
-current_sprite = run_frames[0]
-facing_right = True
+# Indexed like simulation frames: the run cycle, then jump up/down. Mirrored
+# copies are made once here (or come from the asset pack) so drawing never
+# has to flip a surface.
+sprite_cache = {}
+anim_frames = []  # facing right; filled in with the atlas
+SPRITE_FILES = ([f"assets/character/block_0_{i}.png" for i in range(RUN_FRAMES)]
+                + ["assets/character/block_1_0.png", "assets/character/block_1_1.png"])
+
+
+def load_sprite(i):
+    """Frame ``i`` facing right and left, from the asset pack or else scaled from its file."""
+    size = (player_width, player_height)
+    right, left = (packed_image(f"sprite/{i}/{int(facing)}", size) for facing in (True, False))
+    if right is None or left is None:
+        right = pygame.transform.scale(pygame.image.load(resource_path(SPRITE_FILES[i])), size)
+        left = pygame.transform.flip(right, True, False)
+    return i, right, left
+
+
+def install_sprite(loaded):
+    i, right, left = loaded
+    sprite_cache[(i, True)] = right.convert_alpha()
+    sprite_cache[(i, False)] = left.convert_alpha()
+
+
+for i in range(RUN_FRAMES + 2):
+    loader.add(lambda i=i: load_sprite(i), install_sprite)
 
 # ---------------- Game States ----------------
 START, PLAYING, GAME_OVER = 0, 1, 2
-game_state = START
-game_over_sound_played = False
-
-# ---------------- Player Trail + Clones ----------------
-player_trail = []
-clones = []
-player_moved = False
-player_move_time = None
-last_threshold = 0
-
-# ---------------- Score ----------------
-score = 0
-
-# ---------------- Stages ----------------
-stages = [
-    {  # Stage 1
-        "platforms": [
-            pygame.Rect(0, HEIGHT-50, WIDTH, 60),        # floor
-            pygame.Rect(150, HEIGHT-220, 240, 30),
-            pygame.Rect(475, HEIGHT-380, 240, 30),
-            pygame.Rect(800, HEIGHT-220, 240, 30),
-        ],
-    },
-    {  # Stage 2
-        "platforms": [
-            pygame.Rect(0, HEIGHT-50, WIDTH, 60),        # floor
-            pygame.Rect(300, HEIGHT-220, 240, 30),
-            pygame.Rect(650, HEIGHT-380, 240, 30),
-        ],
-    },
-    {  # Stage 3
-        "platforms": [
-            pygame.Rect(0, HEIGHT-50, WIDTH, 60),        # floor
-            pygame.Rect(150, HEIGHT-220, 240, 30),
-            pygame.Rect(475, HEIGHT-380, 240, 30),
-            pygame.Rect(800, HEIGHT-300, 240, 30),
-        ],
-    },
-    {  # Stage 4
-        "platforms": [
-            pygame.Rect(0, HEIGHT-50, WIDTH, 60),        # floor
-            pygame.Rect(150, HEIGHT-300, 240, 30),
-            pygame.Rect(475, HEIGHT-220, 240, 30),
-            pygame.Rect(800, HEIGHT-380, 240, 30),
-        ],
-    }
-]
-
-# ---------------- Generate coins 40px above elevated platforms ----------------
-for stage in stages:
-    stage["collectibles"] = []
-    for plat in stage["platforms"]:
-        # skip floor for coins
-        if plat.y == HEIGHT - 50:
-            continue
-        coin_rect = pygame.Rect(
-            plat.centerx - 15,   # center coin horizontally
-            plat.y - 60,         # 60px above platform
-            30, 30
-        )
-        stage["collectibles"].append(coin_rect)
 
 # --- Highscore: setup SQLite ---
-conn = sqlite3.connect("highscore.db")
-c = conn.cursor()
-c.execute("CREATE TABLE IF NOT EXISTS highscore (id INTEGER PRIMARY KEY, value INTEGER)")
-c.execute("INSERT OR IGNORE INTO highscore (id, value) VALUES (1, 0)")
-conn.commit()
+class HighscoreStore:
+    """Highscore held in memory and persisted to SQLite by a writer thread.
+
+    The value is read from disk once. Updates are queued and the writer
+    folds everything pending into a single commit on a WAL-mode database,
+    so the frame loop never waits on an fsync. WAL mode is stored in the
+    database file itself (the committed highscore.db is already switched);
+    SQLite keeps ``-wal``/``-shm`` files next to it while it is open.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS highscore (id INTEGER PRIMARY KEY, value INTEGER)")
+        conn.execute("INSERT OR IGNORE INTO highscore (id, value) VALUES (1, 0)")
+        conn.commit()
+        self.value = conn.execute("SELECT value FROM highscore WHERE id=1").fetchone()[0]
+        conn.close()
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="highscore-writer", daemon=True)
+        self.writer.start()
+
+    def get(self):
+        return self.value
+
+    def set(self, new_score):
+        self.value = new_score
+        self.pending.put(new_score)
+
+    def close(self):
+        """Flush queued writes and stop the writer thread."""
+        self.pending.put(None)
+        self.writer.join()
+
+    def _write_loop(self):
+        conn = sqlite3.connect(self.path)  # sqlite connections stay on the thread that made them
+        conn.execute("PRAGMA synchronous=NORMAL")
+        stopping = False
+        while not stopping:
+            batch = [self.pending.get()]
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            scores = [value for value in batch if value is not None]
+            if scores:
+                conn.execute("UPDATE highscore SET value=? WHERE id=1", (max(scores),))
+                conn.commit()
+        conn.close()
+
+
+highscores = None
+
+
+def install_highscores(store):
+    global highscores
+    highscores = store
+
+
+loader.add(lambda: HighscoreStore("highscore.db"), install_highscores)
 
 
 def get_highscore():
-    c.execute("SELECT value FROM highscore WHERE id=1")
-    return c.fetchone()[0]
+    return highscores.get()
 
 
 def set_highscore(new_score):
-    c.execute("UPDATE highscore SET value=? WHERE id=1", (new_score,))
-    conn.commit()
+    highscores.set(new_score)
+
 
+# --- Pre-rendered stage layers (background + textured platforms) ---
+stage_layers = {}
+
+
+def stage_layer(index):
+    """Static backdrop for ``stages[index]``, baked the first time it is shown."""
+    layer = stage_layers.get(index)
+    if layer is None:
+        layer = background_img.copy()
+        if stages[index]["overlay"]:  # platforms pre-baked by the level compiler
+            layer.blit(*overlay_surface(stages[index]["overlay"]))
+        else:
+            tex_w, tex_h = platform_texture.get_size()
+            for plat in stages[index]["platforms"][1:]:  # floor is part of the background
+                for x in range(plat.x, plat.x + plat.width, tex_w):
+                    for y in range(plat.y, plat.y + plat.height, tex_h):
+                        layer.blit(platform_texture, (x, y))
+        stage_layers[index] = layer
+    return layer
+
+
+# --- Scrolling worlds: one baked platform layer per chunk, LRU-evicted ---
+CHUNK_LAYER_CACHE = 2 * STREAM_RADIUS + 2
+chunk_layers = OrderedDict()
+
+
+def chunk_layer(world, index, chunk):
+    """Transparent CHUNK_WIDTH-wide layer with the chunk's textured platforms."""
+    key = (world.name, index)
+    layer = chunk_layers.get(key)
+    if layer is None:
+        layer = pygame.Surface((CHUNK_WIDTH, HEIGHT), pygame.SRCALPHA)
+        left = index * CHUNK_WIDTH
+        tex_w, tex_h = platform_texture.get_size()
+        for plat in chunk["platforms"]:
+            if plat.y == HEIGHT - 50:  # floor is part of the background
+                continue
+            for x in range(plat.x, plat.x + plat.width, tex_w):
+                for y in range(plat.y, plat.y + plat.height, tex_h):
+                    layer.blit(platform_texture, (x - left, y))
+        chunk_layers[key] = layer
+        if len(chunk_layers) > CHUNK_LAYER_CACHE:
+            chunk_layers.popitem(last=False)
+    else:
+        chunk_layers.move_to_end(key)
+    return layer
 
-def copy_stage(stage):
-    return [plat.copy() for plat in stage["platforms"]], [coin.copy() for coin in stage["collectibles"]]
 
+def draw_world(sim, camera_x):
+    screen.blit(background_img, (0, 0))
+    for index in range(camera_x // CHUNK_WIDTH, (camera_x + WIDTH - 1) // CHUNK_WIDTH + 1):
+        chunk = sim.chunks.get(index) or sim.world.chunk(index)
+        screen.blit(chunk_layer(sim.world, index, chunk), (index * CHUNK_WIDTH - camera_x, 0))
 
-# --- Initial Stage and Collectibles Setup ---
-stage_index = random.randint(0, len(stages) - 1)
-last_stage_index = stage_index
-platforms, plat_collectibles = copy_stage(stages[stage_index])
-collectibles = []
-for coin in plat_collectibles:
-    coin_type = "blue" if random.random() < 0.05 else "normal"
-    collectibles.append({"rect": coin.copy(), "type": coin_type, "spawn_time": pygame.time.get_ticks()})
 
  # ---------------- Coin Animation ----------------
-coin_frames = [pygame.image.load(resource_path(f"assets/coin/coin_{i}.png")).convert_alpha() for i in range(5)]
 coin_size = 30
-coin_frames = [pygame.transform.scale(f, (coin_size, coin_size)) for f in coin_frames]
-coin_frame_index = 0
-coin_frame_timer = 0
-coin_frame_speed = 5
+coin_frames = [None] * COIN_FRAMES
+
+
+def load_coin(i):
+    frame = packed_image(f"coin/{i}", (coin_size, coin_size))
+    if frame is None:
+        frame = pygame.image.load(resource_path(f"assets/coin/coin_{i}.png"))
+        frame = pygame.transform.scale(frame, (coin_size, coin_size))
+    return i, frame
+
+
+def install_coin(loaded):
+    i, frame = loaded
+    coin_frames[i] = frame.convert_alpha()
+
+
+for i in range(COIN_FRAMES):
+    loader.add(lambda i=i: load_coin(i), install_coin)
+
+# ---------------- Sprite Atlas ----------------
+# Every character frame (plain and shadow-tinted for clones) and every coin
+# frame lives on one surface and is addressed by its area rect, so all of a
+# frame's sprites go out in a single screen.blits() call. Row 0 holds the
+# plain character frames followed by the coins, row 1 the shadow frames.
+SHADOW_TINT = (150, 150, 150)
+SHADOW_ALPHA = 140
+
+
+def build_atlas():
+    """Pack the sprites into one surface; returns (atlas, sprite areas, shadow areas, coin areas)."""
+    keys = sorted(sprite_cache)
+    atlas = pygame.Surface((len(keys) * player_width + COIN_FRAMES * coin_size, 2 * player_height),
+                           pygame.SRCALPHA).convert_alpha()
+    atlas.fill((0, 0, 0, 0))
+    sprite_areas, shadow_areas, coin_areas = {}, {}, []
+    for column, key in enumerate(keys):
+        for areas, row in ((sprite_areas, 0), (shadow_areas, 1)):
+            area = pygame.Rect(column * player_width, row * player_height, player_width, player_height)
+            # MAX onto a cleared surface copies the pixels as they are (a plain blit would blend)
+            atlas.blit(sprite_cache[key], area, special_flags=pygame.BLEND_RGBA_MAX)
+            areas[key] = area
+        atlas.fill(SHADOW_TINT + (SHADOW_ALPHA,), shadow_areas[key], special_flags=pygame.BLEND_RGBA_MULT)
+    for i, frame in enumerate(coin_frames):
+        area = pygame.Rect(len(keys) * player_width + i * coin_size, 0, coin_size, coin_size)
+        atlas.blit(frame, area, special_flags=pygame.BLEND_RGBA_MAX)
+        coin_areas.append(area)
+    return atlas, sprite_areas, shadow_areas, coin_areas
+
+
+sprite_atlas = sprite_areas = shadow_areas = coin_areas = None
+
+
+def install_atlas(_):
+    global sprite_atlas, sprite_areas, shadow_areas, coin_areas
+    sprite_atlas, sprite_areas, shadow_areas, coin_areas = build_atlas()
+    anim_frames[:] = [sprite_cache[(i, True)] for i in range(RUN_FRAMES + 2)]
+
+
+loader.add(install=install_atlas)  # runs once the sprites and coins above are installed
 
 # ---------------- Blue Coin / Invincibility ----------------
-invincible = False
-invincible_timer = 0
-invincible_duration = 5000  # 5 seconds
+# Rainbow tint: hue is quantized to HUE_STEPS colours per cycle and each
+# tinted surface is built once, then served from a bounded LRU cache. The
+# cache holds the whole working set, every player frame in both facings and
+# every coin frame at every hue (512 + 160 = 672 surfaces, ~11.6 MB at 32
+# bits per pixel); anything smaller is thrashed once per hue cycle.
+HUE_STEPS = 32
+HUE_CYCLE_MS = 500
+TINT_CACHE_SIZE = (RUN_FRAMES + 2) * 2 * HUE_STEPS + COIN_FRAMES * HUE_STEPS
+hue_palette = [tuple(int(x * 255) for x in colorsys.hsv_to_rgb(step / HUE_STEPS, 1, 1)) + (255,)
+               for step in range(HUE_STEPS)]
+tint_cache = OrderedDict()
+
+
+def hue_step(ticks):
+    return ticks % HUE_CYCLE_MS * HUE_STEPS // HUE_CYCLE_MS
+
+
+def tinted_sprite(base_key, base, step):
+    """``base`` multiplied by palette colour ``step``, cached under ``base_key``."""
+    key = base_key + (step,)
+    tinted = tint_cache.get(key)
+    if tinted is None:
+        tinted = base.copy()
+        tinted.fill(hue_palette[step], special_flags=pygame.BLEND_RGBA_MULT)
+        tint_cache[key] = tinted
+        if len(tint_cache) > TINT_CACHE_SIZE:
+            tint_cache.popitem(last=False)
+    else:
+        tint_cache.move_to_end(key)
+    return tinted
 
 
 # ---------------- Screens ----------------
-def draw_start_screen():
+def draw_start_screen(progress=None):
+    """The title screen; while assets are still loading, a ``progress`` bar (0..1) replaces the prompt."""
     screen.fill((10, 10, 10))
-    title_text = title_font.render("Shadow Chase", True, (200, 0, 0))
-    screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, HEIGHT // 3))
-    if pygame.time.get_ticks() // 500 % 2 == 0:
-        press_text = menu_font.render("Press SPACE to Begin", True, (180, 180, 180))
+    if title_font is not None:
+        title_text = render_text(title_font, "Shadow Chase", (200, 0, 0))
+        screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, HEIGHT // 3))
+    if progress is not None:
+        bar = pygame.Rect(0, 0, WIDTH // 3, 12)
+        bar.center = (WIDTH // 2, HEIGHT // 2 + 10)
+        pygame.draw.rect(screen, (80, 80, 80), bar, 1)
+        pygame.draw.rect(screen, (180, 180, 180), (bar.x + 2, bar.y + 2, round((bar.w - 4) * progress), bar.h - 4))
+    elif pygame.time.get_ticks() // 500 % 2 == 0:
+        press_text = render_text(menu_font, "Press SPACE to Begin", (180, 180, 180))
         screen.blit(press_text, (WIDTH // 2 - press_text.get_width() // 2, HEIGHT // 2))
 
 
-def draw_game_over_screen():
+def draw_game_over_screen(score):
     screen.fill((0, 0, 0))
-    over_text = title_font.render("Game Over", True, (255, 0, 0))
+    over_text = render_text(title_font, "Game Over", (255, 0, 0))
     screen.blit(over_text, (WIDTH // 2 - over_text.get_width() // 2, HEIGHT // 3))
-    score_text = menu_font.render(f"Score: {score}", True, (200, 200, 200))
+    score_text = over_score_label.render(score)
     highscore = get_highscore()
-    highscore_text = menu_font.render(f"Highscore: {highscore}", True, (255, 255, 0))
+    highscore_text = over_highscore_label.render(highscore)
     screen.blit(highscore_text, (WIDTH // 2 - highscore_text.get_width() // 2, HEIGHT // 2 + 120))
     screen.blit(score_text, (WIDTH // 2 - score_text.get_width() // 2, HEIGHT // 2))
-    restart_text = menu_font.render("Press SPACE to Restart", True, (180, 180, 180))
+    restart_text = render_text(menu_font, "Press SPACE to Restart", (180, 180, 180))
     screen.blit(restart_text, (WIDTH // 2 - restart_text.get_width() // 2, HEIGHT // 2 + 50))
 
 
  # ---------------- Music ----------------
-try:
-    pygame.mixer.music.load(resource_path("assets/music/music.mp3"))
-    pygame.mixer.music.play(-1)
-except Exception:
-    pass
+MUSIC_FILE = "assets/music/music.mp3"
 
-# ---------------- Main Loop ----------------
-running = True
-while running:
-    dt = clock.tick(60)
-    keys = pygame.key.get_pressed()
-
-    # Event handling
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
 
-    # ---------------- START STATE ----------------
-    if game_state == START:
-        draw_start_screen()
-        if keys[pygame.K_SPACE]:
-            game_state = PLAYING
-            score = 0
-            last_threshold = 0
-            player_trail = []
-            clones = []
-            player_moved = False
-            player_move_time = None
-            stage_index = random.randint(0, len(stages) - 1)
-            last_stage_index = stage_index
-            platforms, plat_collectibles = copy_stage(stages[stage_index])
-            collectibles = []
-            for coin in plat_collectibles:
-                coin_type = "blue" if random.random() < 0.05 else "normal"
-                collectibles.append({"rect": coin.copy(), "type": coin_type, "spawn_time": pygame.time.get_ticks()})
-            game_over_sound_played = False
-            invincible = False
-
-    # ---------------- PLAYING STATE ----------------
-    elif game_state == PLAYING:
-        screen.blit(background_img, (0, 0))
-
-        # --- Player movement input ---
-        moved_this_frame = False
-        if keys[pygame.K_LEFT]:
-            player_rect.x -= player_speed
-            facing_right = False
-            moved_this_frame = True
-        if keys[pygame.K_RIGHT]:
-            player_rect.x += player_speed
-            facing_right = True
-            moved_this_frame = True
-
-        # --- Wrap around screen edges ---
-        if player_rect.right < 0:
-            player_rect.left = WIDTH
-        elif player_rect.left > WIDTH:
-            player_rect.right = 0
-
-        if keys[pygame.K_SPACE] and on_ground:
+def start_music():
+    try:
+        if asset_pack and "music" in asset_pack:
+            pygame.mixer.music.load(io.BytesIO(asset_pack.data("music")), "mp3")
+        else:
+            pygame.mixer.music.load(resource_path(MUSIC_FILE))
+        pygame.mixer.music.play(-1)
+    except Exception:
+        pass
+
+
+loader.background(start_music)
+
+
+# ---------------- Sound Effects ----------------
+class SoundBank:
+    """Decodes each sound effect once and plays it on a pool of reserved channels.
+
+    When every channel in the pool is busy the one that started playing
+    longest ago is stolen, so a burst of coin pickups never waits on disk
+    or drops the newest sound.
+    """
+
+    def __init__(self, files, volumes, channels=6, pcm=None):
+        self.files = files
+        self.pcm = pcm or {}  # name -> pre-decoded samples (asset pack), used instead of the file
+        self.volumes = volumes
+        self.sounds = {}
+        self.channels = []
+        self.started = []
+        self.plays = 0
+        try:
+            pygame.mixer.set_reserved(channels)
+            self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+            self.started = [0] * channels
+        except pygame.error:
+            pass  # no audio device: play() becomes a no-op
+
+    def load(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
             try:
-                pygame.mixer.Sound(resource_path("assets/music/jump.mp3")).play().set_volume(0.1)
-            except Exception:
-                pass
-            player_vel_y = jump_velocity
-            on_ground = False
-            moved_this_frame = True
-
-        if moved_this_frame:
-            player_moved = True
-            if player_move_time is None:
-                player_move_time = pygame.time.get_ticks()
-
-        # --- Physics ---
-        player_vel_y += gravity
-        player_rect.y += player_vel_y
-
-        # --- Platform collision ---
-        on_ground = False
-        for plat in platforms:
-            if player_rect.colliderect(plat) and player_vel_y >= 0:
-                if plat.top < HEIGHT - 60:
-                    if not keys[pygame.K_DOWN]:
-                        player_rect.bottom = plat.top
-                        player_vel_y = 0
-                        on_ground = True
-                else:
-                    player_rect.bottom = plat.top
-                    player_vel_y = 0
-                    on_ground = True
-
-        # --- Trail recording ---
-        if player_moved:
-            player_trail.append((player_rect.x, player_rect.y))
-
-        # --- Clone spawning ---
-        if player_moved and len(clones) == 0 and pygame.time.get_ticks() - player_move_time >= 1500:
-            delay_frames = int(1.5 * 60)
-            clone_trail = player_trail[-delay_frames:] if len(player_trail) >= delay_frames else player_trail.copy()
-            if clone_trail:
-                init_x, init_y = clone_trail[0]
-            else:
-                init_x, init_y = player_rect.x, player_rect.y
-            if len(clone_trail) >= 2:
-                fx = clone_trail[-1][0] - clone_trail[0][0]
-                initial_facing = True if fx >= 0 else False
-            else:
-                initial_facing = facing_right
-            clones.append({
-                "rect": pygame.Rect(init_x, init_y, player_width, player_height),
-                "trail": clone_trail.copy(),
-                "delay": delay_frames,
-                "facing_right": initial_facing,
-                "frame_index": 0,
-                "frame_timer": 0,
-                "prev_x": init_x,
-                "prev_y": init_y,
-                "last_dy": 0
-            })
-
-        if score // 10 > last_threshold and len(clones) > 0:
-            last_threshold = score // 10
-            delay_frames = int(1.5 * 60 * (len(clones) + 1))
-            clone_trail = player_trail[-delay_frames:] if len(player_trail) >= delay_frames else player_trail.copy()
-            if clone_trail:
-                init_x, init_y = clone_trail[0]
-            else:
-                init_x, init_y = player_rect.x, player_rect.y
-            if len(clone_trail) >= 2:
-                fx = clone_trail[-1][0] - clone_trail[0][0]
-                initial_facing = True if fx >= 0 else False
-            else:
-                initial_facing = facing_right
-            clones.append({
-                "rect": pygame.Rect(init_x, init_y, player_width, player_height),
-                "trail": clone_trail.copy(),
-                "delay": delay_frames,
-                "facing_right": initial_facing,
-                "frame_index": 0,
-                "frame_timer": 0,
-                "prev_x": init_x,
-                "prev_y": init_y,
-                "last_dy": 0
-            })
-
-        # --- Update clones ---
-        for clone in clones:
-            clone["trail"].append((player_rect.x, player_rect.y))
-            if len(clone["trail"]) > clone["delay"]:
-                bx, by = clone["trail"].pop(0)
-                prev_x = clone.get("prev_x", clone["rect"].x)
-                prev_y = clone.get("prev_y", clone["rect"].y)
-                dx = bx - prev_x
-                dy = by - prev_y
-                clone["rect"].x = bx
-                clone["rect"].y = by
-                if dx > 0:
-                    clone["facing_right"] = True
-                elif dx < 0:
-                    clone["facing_right"] = False
-                clone["prev_x"] = bx
-                clone["prev_y"] = by
-                clone["last_dy"] = dy
-            if player_rect.colliderect(clone["rect"]) and not invincible:
-                game_state = GAME_OVER
-
-        # --- Update coin animation ---
-        coin_frame_timer += 1
-        if coin_frame_timer >= coin_frame_speed:
-            coin_frame_timer = 0
-            coin_frame_index = (coin_frame_index + 1) % len(coin_frames)
-
-        # --- Collectibles collision ---
-        for coin in collectibles[:]:
-            if player_rect.colliderect(coin["rect"]):
-                try:
-                    pygame.mixer.Sound(resource_path("assets/music/coin.mp3")).play().set_volume(0.4)
-                except Exception:
-                    pass
-                if coin["type"] == "blue":
-                    invincible = True
-                    invincible_timer = pygame.time.get_ticks()
+                if name in self.pcm:
+                    sound = pygame.mixer.Sound(buffer=self.pcm[name])
                 else:
-                    score += 1
-                collectibles.remove(coin)
+                    sound = pygame.mixer.Sound(self.files[name])
+                sound.set_volume(self.volumes.get(name, 1.0))
+            except Exception:
+                sound = False  # remember the failure instead of retrying every event
+            self.sounds[name] = sound
+        return sound
+
+    def preload(self):
+        for name in self.files:
+            self.load(name)
+
+    def play(self, name):
+        sound = self.load(name)
+        if not sound or not self.channels:
+            return
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                break
+        else:
+            i = self.started.index(min(self.started))
+        self.plays += 1
+        self.started[i] = self.plays
+        self.channels[i].play(sound)
 
-        # --- Update invincibility ---
-        if invincible:
-            if pygame.time.get_ticks() - invincible_timer >= invincible_duration:
-                invincible = False
 
-        # --- Stage transition ---
-        if not collectibles:
-            try:
-                pygame.mixer.Sound(resource_path("assets/music/level.mp3")).play().set_volume(0.2)
-            except Exception:
-                pass
-            available = [i for i in range(len(stages)) if i != last_stage_index]
-            stage_index = random.choice(available)
-            last_stage_index = stage_index
-            platforms, plat_collectibles = copy_stage(stages[stage_index])
-            collectibles = []
-            for coin in plat_collectibles:
-                coin_type = "blue" if random.random() < 0.08 else "normal"
-                collectibles.append({"rect": coin.copy(), "type": coin_type, "spawn_time": pygame.time.get_ticks()})
-
-        # --- Draw platforms with texture ---
-        for plat in platforms[1:]:
-            tex_w, tex_h = platform_texture.get_size()
-            for x in range(plat.x, plat.x + plat.width, tex_w):
-                for y in range(plat.y, plat.y + plat.height, tex_h):
-                    screen.blit(platform_texture, (x, y))
-
-        # --- Draw collectibles ---
-        for coin in collectibles:
-            if coin["type"] == "blue":  # special coin
-                # Calculate a cycling hue based on time
-                t = pygame.time.get_ticks() / 500  # speed of color cycle
-                hue = (t % 1.0)  # hue goes from 0.0 to 1.0
-                r, g, b = [int(x * 255) for x in colorsys.hsv_to_rgb(hue, 1, 1)]
-
-                # Apply color overlay
-                colored_coin = coin_frames[coin_frame_index].copy()
-                colored_coin.fill((r, g, b, 255), special_flags=pygame.BLEND_RGBA_MULT)
-                screen.blit(colored_coin, (coin["rect"].x, coin["rect"].y))
-            else:
-                # normal coin
-                screen.blit(coin_frames[coin_frame_index], (coin["rect"].x, coin["rect"].y))
+sound_files = {name: resource_path(f"assets/music/{name}.mp3") for name in ("jump", "coin", "level", "game-over")}
+sound_volumes = {"jump": 0.1, "coin": 0.4, "level": 0.2, "game-over": 0.5}
+sounds = SoundBank(sound_files, sound_volumes, pcm=asset_pack.sound_pcm() if asset_pack else None)
+# Not needed before the first jump: decoded in the background, or on first play if that comes sooner.
+loader.background(sounds.preload)
 
-        # --- Draw player ---
-        if not on_ground:
-            current_sprite = jump_up if player_vel_y < 0 else jump_down
-        else:
-            frame_timer += 1
-            if frame_timer >= 5:
-                frame_timer = 0
-                frame_index = (frame_index + 1) % len(run_frames)
-            current_sprite = run_frames[frame_index]
-
-        sprite_to_draw = current_sprite if facing_right else pygame.transform.flip(current_sprite, True, False)
-
-        # Apply invincibility color cycling
-        if invincible:
-            t = pygame.time.get_ticks() / 500  # speed of color cycling
-            hue = (t % 1.0)
-            r, g, b = [int(x * 255) for x in colorsys.hsv_to_rgb(hue, 1, 1)]
-            tinted_sprite = sprite_to_draw.copy()
-            tinted_sprite.fill((r, g, b, 255), special_flags=pygame.BLEND_RGBA_MULT)
-            sprite_to_draw = tinted_sprite
-
-        screen.blit(sprite_to_draw, (player_rect.x, player_rect.y))
-
-        # --- Draw clones ---
-        for clone in clones:
-            clone_on_ground = False
-            for plat in platforms:
-                if clone["rect"].colliderect(plat) and abs(clone["rect"].bottom - plat.top) <= 6:
-                    clone_on_ground = True
+# ---------------- Interpolation ----------------
+def lerp_pos(pos, last_pos, alpha):
+    """Draw position ``alpha`` of the way from ``last_pos`` to ``pos``."""
+    x, y = pos
+    last_x, last_y = last_pos
+    if abs(x - last_x) > WIDTH // 2:  # wrapped around the screen edge
+        return x, y
+    return round(last_x + (x - last_x) * alpha), round(last_y + (y - last_y) * alpha)
+
+
+# ---------------- Main Loop ----------------
+PROFILE_SECTIONS = ["input", "physics", "platform_collision", "clone_update", "coin_collision",
+                    "stage_transition", "animation", "platform_draw", "coin_draw", "player_draw",
+                    "clone_draw", "hud", "blits", "overlay", "flip"]
+
+
+def main(sim=None, get_keys=pygame.key.get_pressed, frame_ms=None, max_frames=None, on_frame=None):
+    """Run the game until the window is closed (or ``max_frames`` have passed).
+
+    The defaults are the interactive game. Tools such as bench.py drive it
+    headless by passing scripted ``get_keys``, a fixed ``frame_ms`` of game
+    time per frame instead of the wall clock, and ``on_frame(frame, sim)``,
+    which is called at the start of every frame. Returns the simulation.
+    """
+    global startup_ms
+    if sim is None:
+        sim = Simulation(world=worlds[WORLD] if WORLD else None)
+    game_state = START
+    game_over_sound_played = False
+    recorder = None
+    profiler = FrameProfiler(PROFILE_SECTIONS)
+    profiler.enabled = PROFILE
+    sim.profiler = profiler if PROFILE else None
+    accumulator = 0.0  # ms of game time not yet simulated
+    drawn_layer = None  # stage layer currently on screen (dirty-rect mode)
+    last_drawn_rects = []  # screen areas covered by sprites/HUD last frame
+    frame = 0
+    running = True
+    while running:
+        dt = clock.tick(0 if frame_ms else RENDER_FPS)
+        if frame_ms:
+            dt = frame_ms
+        if on_frame:
+            on_frame(frame, sim)
+        dirty_rects = None  # None means flip the whole display
+        profiler.start_frame()
+        keys = get_keys()
+        profiler_toggled = False
+
+        # Event handling
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.enabled = not profiler.enabled
+                sim.profiler = profiler if profiler.enabled else None
+                profiler.start_frame()  # don't time from the frame it was last disabled in
+                profiler_toggled = True
+                drawn_layer = None  # clear the overlay in dirty-rect mode
+
+        # Only these frames go into the profile; the one F3 was pressed in is partial.
+        playing_frame = game_state == PLAYING and not profiler_toggled
+
+        # ---------------- START STATE ----------------
+        if game_state == START:
+            loaded = loader.poll()  # installs whatever the loader threads have finished
+            if loaded:
+                load_assets()  # nothing left to wait for; records ready_ms
+            draw_start_screen(None if loaded else loader.progress)
+            drawn_layer = None
+            if loaded and keys[pygame.K_SPACE]:
+                game_state = PLAYING
+                sim.reset()
+                recorder = ReplayRecorder(sim.seed, WORLD) if RECORD_PATH else None
+                accumulator = 0.0
+                game_over_sound_played = False
+
+        # ---------------- PLAYING STATE ----------------
+        elif game_state == PLAYING:
+            # --- Input ---
+            inputs = 0
+            if keys[pygame.K_LEFT]:
+                inputs |= INPUT_LEFT
+            if keys[pygame.K_RIGHT]:
+                inputs |= INPUT_RIGHT
+            if keys[pygame.K_SPACE]:
+                inputs |= INPUT_JUMP
+            if keys[pygame.K_DOWN]:
+                inputs |= INPUT_DOWN
+            profiler.mark("input")
+
+            # --- Simulation (fixed timestep) ---
+            accumulator = min(accumulator + dt, MAX_TICKS_PER_FRAME * TICK_MS)
+            while accumulator >= TICK_MS:
+                accumulator -= TICK_MS
+                if recorder:
+                    recorder.record(inputs)
+                for sound in sim.step(inputs):
+                    sounds.play(sound)
+                if sim.game_over:
+                    game_state = GAME_OVER
+                    accumulator = 0.0
                     break
-            last_dy = clone.get("last_dy", 0)
-            if not clone_on_ground:
-                clone_sprite = jump_up if last_dy < 0 else jump_down
+            alpha = accumulator / TICK_MS
+            player_x, player_y = lerp_pos(sim.player_rect.topleft, sim.last_player_pos, alpha)
+
+            # --- Draw background and platforms ---
+            camera_x = 0
+            if sim.world is not None:
+                # The camera follows the player and stops at the world's ends.
+                camera_x = min(max(player_x + player_width // 2 - WIDTH // 2, 0), sim.world_width - WIDTH)
+                draw_world(sim, camera_x)
+                drawn_layer = None  # the view scrolls, so every frame is a full redraw
+                last_drawn_rects = [screen.get_rect()]
             else:
-                clone["frame_timer"] += 1
-                if clone["frame_timer"] >= 5:
-                    clone["frame_timer"] = 0
-                    clone["frame_index"] = (clone["frame_index"] + 1) % len(run_frames)
-                clone_sprite = run_frames[clone["frame_index"]]
-            sprite_to_draw_clone = clone_sprite if clone["facing_right"] else pygame.transform.flip(clone_sprite, True,
-                                                                                                    False)
-            shadow = sprite_to_draw_clone.copy()
-            shadow.fill((150, 150, 150, 140), special_flags=pygame.BLEND_RGBA_MULT)
-            screen.blit(shadow, (clone["rect"].x, clone["rect"].y))
-
-        # --- HUD ---
-        screen.blit(small_font.render(f"Score: {score}", True, BLACK), (10, 10))
-        screen.blit(small_font.render(f"Clones: {len(clones)}", True, BLACK), (10, 40))
-        if invincible:
-            screen.blit(small_font.render("INVINCIBLE!", True, (0, 0, 255)), (10, 70))
-
-    # ---------------- GAME OVER ----------------
-    elif game_state == GAME_OVER:
-        if not game_over_sound_played:
-            # --- Highscore Check ---
-            old_highscore = get_highscore()
-            if score > old_highscore:
-                set_highscore(score)
-            try:
-                pygame.mixer.Sound(resource_path("assets/music/game-over.mp3")).play().set_volume(0.5)
-            except Exception:
-                pass
-            game_over_sound_played = True
-
-        draw_game_over_screen()
-        if keys[pygame.K_SPACE]:
-            player_rect = pygame.Rect(150, HEIGHT - 150, player_width, player_height)
-            player_vel_y = 0
-            on_ground = False
-            score = 0
-            last_threshold = 0
-            player_moved = False
-            player_move_time = None
-            player_trail = []
-            clones = []
-            stage_index = random.randint(0, len(stages) - 1)
-            last_stage_index = stage_index
-            platforms, plat_collectibles = copy_stage(stages[stage_index])
-            collectibles = []
-            for coin in plat_collectibles:
-                coin_type = "blue" if random.random() < 0.05 else "normal"
-                collectibles.append({"rect": coin.copy(), "type": coin_type, "spawn_time": pygame.time.get_ticks()})
-            game_state = PLAYING
-            game_over_sound_played = False
-            invincible = False
-
-    pygame.display.flip()
-
-conn.close()
-pygame.quit()
-
-# Add main guard for PyInstaller compatibility
+                layer = stage_layer(sim.stage_index)
+                if not DIRTY_RECTS or layer is not drawn_layer:
+                    screen.blit(layer, (0, 0))
+                    drawn_layer = layer
+                    last_drawn_rects = [screen.get_rect()]
+                else:
+                    for rect in last_drawn_rects:  # erase last frame's sprites
+                        screen.blit(layer, rect, rect)
+            profiler.mark("platform_draw")
+
+            # Sprites and HUD are collected as (surface, position[, area]) and
+            # submitted together with one screen.blits() below.
+            batch = []
+
+            # --- Draw collectibles ---
+            hue = hue_step(pygame.time.get_ticks())  # shared by blue coins and invincibility
+            coin_frame_index = sim.coin_frame_index
+            coin_area = coin_areas[coin_frame_index]
+            for coin in sim.collectibles:
+                rect = coin.rect
+                if coin.type == "blue":  # special coin
+                    colored_coin = tinted_sprite(("coin", coin_frame_index), coin_frames[coin_frame_index], hue)
+                    batch.append((colored_coin, (rect.x - camera_x, rect.y)))
+                else:
+                    # normal coin
+                    batch.append((sprite_atlas, (rect.x - camera_x, rect.y), coin_area))
+            profiler.mark("coin_draw")
+
+            # --- Draw player ---
+            sprite_key = (sim.current_frame, sim.facing_right)
+            if sim.invincible:  # invincibility color cycling
+                tinted = tinted_sprite(sprite_key, sprite_cache[sprite_key], hue)
+                batch.append((tinted, (player_x - camera_x, player_y)))
+            else:
+                batch.append((sprite_atlas, (player_x - camera_x, player_y), sprite_areas[sprite_key]))
+            profiler.mark("player_draw")
+
+            # --- Draw clones ---
+            for clone in sim.clones:
+                clone_x, clone_y = lerp_pos(clone.rect.topleft, clone.last_pos, alpha)
+                if -player_width < clone_x - camera_x < WIDTH:
+                    batch.append((sprite_atlas, (clone_x - camera_x, clone_y),
+                                  shadow_areas[clone.frame, clone.facing_right]))
+            profiler.mark("clone_draw")
+
+            # --- HUD ---
+            batch.append((hud_score_label.render(sim.score), (10, 10)))
+            batch.append((hud_clones_label.render(len(sim.clones)), (10, 40)))
+            if sim.invincible:
+                batch.append((render_text(small_font, "INVINCIBLE!", (0, 0, 255)), (10, 70)))
+            profiler.mark("hud")
+            drawn_rects = screen.blits(batch, doreturn=DIRTY_RECTS) or []
+            profiler.mark("blits")
+            if profiler.enabled:
+                drawn_rects.append(profiler.draw(screen))
+                profiler.mark("overlay")
+
+            if DIRTY_RECTS:
+                dirty_rects = last_drawn_rects + drawn_rects
+                last_drawn_rects = drawn_rects
+
+        # ---------------- GAME OVER ----------------
+        elif game_state == GAME_OVER:
+            if not game_over_sound_played:
+                # --- Highscore Check ---
+                old_highscore = get_highscore()
+                if sim.score > old_highscore:
+                    set_highscore(sim.score)
+                sounds.play("game-over")
+                if recorder:
+                    recorder.save(RECORD_PATH)
+                    recorder = None
+                game_over_sound_played = True
+
+            draw_game_over_screen(sim.score)
+            drawn_layer = None
+            if keys[pygame.K_SPACE]:
+                sim.reset()
+                recorder = ReplayRecorder(sim.seed, WORLD) if RECORD_PATH else None
+                accumulator = 0.0
+                game_state = PLAYING
+                game_over_sound_played = False
+
+        if dirty_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty_rects)
+        if startup_ms is None:
+            startup_ms = (time.perf_counter() - LAUNCHED) * 1000
+        profiler.mark("flip")
+        profiler.end_frame(keep=playing_frame)
+        frame += 1
+        if max_frames and frame >= max_frames:
+            running = False
+
+    if recorder:  # quit mid-run
+        recorder.save(RECORD_PATH)
+    if profiler.frames:
+        profiler.dump(PROFILE_PATH)
+    return sim
+
+
 if __name__ == "__main__":
-    pass  # The script already runs as main, but this guard is needed for PyInstaller
+    main()
+    load_assets()  # in case the window was closed while loading
+    highscores.close()
+    pygame.quit()
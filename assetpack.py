@@ -0,0 +1,149 @@
+import os
+import sys
+import mmap
+import struct
+import pygame
+
+# ---------------- Asset Pack Format ----------------
+# One file holding every asset the game loads at startup, already in its
+# final form: sprites at their in-game size (mirrored frames included),
+# sound effects decoded to PCM and the music track as is.
+#
+#   header  "<4sBIiiB"  magic b"SCAP", version, entry count, and the mixer
+#                       format (frequency, sample size, channels) of the PCM
+#   index   per entry "<H4sQQII": name length, kind, offset, size, width,
+#           height, followed by the UTF-8 name
+#   data    the payloads, at the offsets in the index
+#
+# Kinds are b"RGBA" / b"RGB " (raw pixels), b"PCM " (mixer samples) and
+# b"RAW " (file bytes). The game memory-maps the pack, so startup is one
+# open() instead of a dozen PNG/MP3 reads and decodes, which matters most
+# in the PyInstaller build. Build it from the game directory:
+#
+#   python assetpack.py [assets.pack]
+MAGIC = b"SCAP"
+VERSION = 1
+HEADER = struct.Struct("<4sBIiiB")
+ENTRY = struct.Struct("<H4sQQII")
+
+
+def write_pack(path, mixer_format, entries):
+    """Write ``entries`` ((name, kind, payload, width, height) tuples) to ``path``."""
+    names = [name.encode() for name, *_ in entries]
+    offset = HEADER.size + sum(ENTRY.size + len(name) for name in names)
+    index = []
+    for name, (_, kind, payload, width, height) in zip(names, entries):
+        index.append(ENTRY.pack(len(name), kind, offset, len(payload), width, height) + name)
+        offset += len(payload)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries), *mixer_format))
+        f.write(b"".join(index))
+        for _, _, payload, _, _ in entries:
+            f.write(payload)
+    os.replace(tmp, path)
+
+
+class AssetPack:
+    """A memory-mapped asset pack; payloads are served as zero-copy views."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self.file.close()
+            raise ValueError(f"{path}: not an asset pack")
+        magic, version, count, *mixer_format = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a version {VERSION} asset pack")
+        self.mixer_format = tuple(mixer_format)
+        self.view = memoryview(self.map)
+        self.entries = {}
+        pos = HEADER.size
+        for _ in range(count):
+            name_len, kind, offset, size, width, height = ENTRY.unpack_from(self.map, pos)
+            pos += ENTRY.size
+            name = self.map[pos:pos + name_len].decode()
+            pos += name_len
+            self.entries[name] = (kind, offset, size, width, height)
+
+    @classmethod
+    def open(cls, path):
+        """The pack at ``path``, or None if there is no usable one."""
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def data(self, name):
+        kind, offset, size, width, height = self.entries[name]
+        return self.view[offset:offset + size]
+
+    def image(self, name, size=None):
+        """Surface for ``name`` (sharing the mapped bytes), or None if absent or not ``size``.
+
+        Convert it before drawing; the result no longer depends on the pack.
+        """
+        entry = self.entries.get(name)
+        if entry is None or entry[0] not in (b"RGBA", b"RGB "):
+            return None
+        kind, offset, length, width, height = entry
+        if size is not None and (width, height) != tuple(size):
+            return None
+        return pygame.image.frombuffer(self.view[offset:offset + length], (width, height), kind.decode().strip())
+
+    def sound_pcm(self, prefix="sound/"):
+        """{name: PCM view} for the packed sound effects, if the mixer runs in the format they were decoded for."""
+        if pygame.mixer.get_init() != self.mixer_format:
+            return {}
+        return {name[len(prefix):]: self.data(name) for name, entry in self.entries.items()
+                if name.startswith(prefix) and entry[0] == b"PCM "}
+
+    def close(self):
+        if hasattr(self, "view"):
+            self.view.release()
+        self.map.close()
+        self.file.close()
+
+
+def build(path):
+    """Load the assets exactly as Game2 does (from the loose files) and pack the results."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ["SHADOW_CHASE_ASSET_PACK"] = ""  # make Game2 read the loose files
+    import Game2
+    Game2.load_assets()
+
+    def image(name, surface, kind=b"RGBA"):
+        return (name, kind, pygame.image.tobytes(surface, kind.decode().strip()), *surface.get_size())
+
+    entries = [image("background", Game2.background_img, b"RGB "), image("platform", Game2.platform_texture)]
+    for (frame, facing), surface in sorted(Game2.sprite_cache.items()):
+        entries.append(image(f"sprite/{frame}/{int(facing)}", surface))
+    for i, surface in enumerate(Game2.coin_frames):
+        entries.append(image(f"coin/{i}", surface))
+    for name, file_name in Game2.sound_files.items():
+        try:
+            entries.append((f"sound/{name}", b"PCM ", pygame.mixer.Sound(file_name).get_raw(), 0, 0))
+        except pygame.error as e:
+            print(f"skipping sound {name}: {e}")
+    try:
+        with open(Game2.resource_path(Game2.MUSIC_FILE), "rb") as f:
+            entries.append(("music", b"RAW ", f.read(), 0, 0))
+    except OSError as e:
+        print(f"skipping music: {e}")
+    mixer_format = pygame.mixer.get_init() or (0, 0, 0)
+    write_pack(path, mixer_format, entries)
+    Game2.highscores.close()
+    return entries
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else "assets.pack"
+    entries = build(out)
+    print(f"{out}: {len(entries)} entries, {os.path.getsize(out) / 1e6:.1f} MB")
@@ -0,0 +1,299 @@
+import sys
+import numpy as np
+from simulation import (WIDTH, HEIGHT, TICK_RATE, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_DOWN,
+                        player_width, player_height, jump_velocity, gravity, player_speed,
+                        clone_delay_frames, trail_capacity, stages, Simulation)
+
+# ---------------- Batched Game Rules ----------------
+# The rules of simulation.Simulation, rewritten over NumPy arrays so one
+# step() advances N independent games. Built for bots: there is no
+# animation state, no events and no rendering.
+#
+# Clones need little state of their own here. Clone k (1-based) replays the
+# trail min(k * clone_delay_frames, trail_capacity - 1) ticks back (one tick
+# less for that many ticks after it spawns, see simulation.Clone), so a
+# game's clones are described by how many it has and when each spawned.
+# Clones past MAX_CLONES share the last slot and stand on top of it.
+MAX_CLONES = -(-(trail_capacity - 1) // clone_delay_frames)
+CLONE_DELAYS = np.minimum(np.arange(1, MAX_CLONES + 1) * clone_delay_frames, trail_capacity - 1)
+COIN_SIZE = 30
+
+
+def pack_rects(rect_lists):
+    """Pad per-stage rect lists into an (S, N, 4) int32 array plus an (S, N) mask."""
+    longest = max(len(rects) for rects in rect_lists)
+    packed = np.zeros((len(rect_lists), longest, 4), dtype=np.int32)
+    mask = np.zeros((len(rect_lists), longest), dtype=bool)
+    for s, rects in enumerate(rect_lists):
+        for i, rect in enumerate(rects):
+            packed[s, i] = (rect.x, rect.y, rect.w, rect.h)
+            mask[s, i] = True
+    return packed, mask
+
+
+STAGE_PLATFORMS, STAGE_PLATFORM_MASK = pack_rects([stage["platforms"] for stage in stages])
+STAGE_COINS, STAGE_COIN_MASK = pack_rects([stage["collectibles"] for stage in stages])
+
+
+class BatchEnv:
+    """``n`` games of Shadow Chase stepped in lockstep.
+
+    ``step(actions)`` takes one ``INPUT_*`` bitmask per game and returns
+    ``(obs, rewards, dones)``: rewards are score deltas and a game is
+    done when a clone catches its player or the player falls off the
+    bottom of the screen (through the wrap gap). Finished games are reset
+    automatically (``autoreset=False`` leaves them frozen until
+    ``reset``), so the returned observation of a done game is already
+    the first one of its next run.
+
+    The whole batch draws from one ``numpy.random.Generator``: a seed
+    reproduces the batch, but runs don't match ``Simulation`` runs with
+    the same seed.
+    """
+
+    # Balancing knobs, defaulting to Simulation's.
+    invincible_duration = Simulation.invincible_duration
+    clone_spawn_delay = Simulation.clone_spawn_delay
+    clone_score_step = Simulation.clone_score_step
+    start_blue_odds = Simulation.start_blue_odds
+    stage_blue_odds = Simulation.stage_blue_odds
+
+    def __init__(self, n, seed=None, autoreset=True):
+        self.n = n
+        self.autoreset = autoreset
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(n)
+
+        # Player
+        self.x = np.zeros(n, dtype=np.int32)
+        self.y = np.zeros(n, dtype=np.int32)
+        self.vel_y = np.zeros(n, dtype=np.int32)
+        self.on_ground = np.zeros(n, dtype=bool)
+        self.facing_right = np.zeros(n, dtype=bool)
+        self.moved = np.zeros(n, dtype=bool)
+        self.move_tick = np.zeros(n, dtype=np.int64)
+
+        # Run state
+        self.tick = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.last_threshold = np.zeros(n, dtype=np.int64)
+        self.invincible = np.zeros(n, dtype=bool)
+        self.invincible_tick = np.zeros(n, dtype=np.int64)
+        self.num_clones = np.zeros(n, dtype=np.int64)
+        self.clone_tick = np.zeros((n, MAX_CLONES), dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+
+        # Stage + coins
+        self.stage_index = np.zeros(n, dtype=np.int64)
+        self.coin_alive = np.zeros((n, STAGE_COINS.shape[1]), dtype=bool)
+        self.coin_blue = np.zeros((n, STAGE_COINS.shape[1]), dtype=bool)
+
+        # Trail ring, one row per game
+        self.trail_x = np.zeros((n, trail_capacity), dtype=np.int32)
+        self.trail_y = np.zeros((n, trail_capacity), dtype=np.int32)
+        self.trail_head = np.zeros(n, dtype=np.int64)
+        self.trail_count = np.zeros(n, dtype=np.int64)
+
+        self.reset()
+
+    def ms_to_ticks(self, ms):
+        return ms * TICK_RATE // 1000
+
+    def reset(self, mask=None):
+        """Start fresh runs for the games in ``mask`` (all by default); returns observations."""
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.restart(mask)
+        return self.observe()
+
+    def restart(self, mask):
+        count = int(mask.sum())
+        self.x[mask] = 150
+        self.y[mask] = HEIGHT - 150
+        self.vel_y[mask] = 0
+        self.on_ground[mask] = False
+        self.facing_right[mask] = True
+        self.moved[mask] = False
+        self.move_tick[mask] = 0
+        self.tick[mask] = 0
+        self.score[mask] = 0
+        self.last_threshold[mask] = 0
+        self.invincible[mask] = False
+        self.invincible_tick[mask] = 0
+        self.num_clones[mask] = 0
+        self.clone_tick[mask] = 0
+        self.done[mask] = False
+        self.trail_head[mask] = 0
+        self.trail_count[mask] = 0
+        self.load_stages(mask, self.rng.integers(0, len(stages), size=count), self.start_blue_odds)
+
+    def load_stages(self, mask, stage_indices, blue_odds):
+        self.stage_index[mask] = stage_indices
+        self.coin_alive[mask] = STAGE_COIN_MASK[stage_indices]
+        self.coin_blue[mask] = self.rng.random((len(stage_indices), STAGE_COINS.shape[1])) < blue_odds
+
+    def step(self, actions):
+        """Advance every live game one tick; returns ``(obs, rewards, dones)``."""
+        actions = np.asarray(actions, dtype=np.uint8)
+        live = ~self.done
+        score_before = self.score.copy()
+        self.tick[live] += 1
+
+        self.apply_input(actions, live)
+        self.vel_y[live] += gravity
+        self.y[live] += self.vel_y[live]
+        self.collide_platforms(actions, live)
+        self.update_clones(live)
+        self.collect_coins(live)
+        self.advance_stages(live)
+        self.done |= live & (self.y > HEIGHT)  # fell through the wrap gap; y would otherwise grow without bound
+
+        rewards = (self.score - score_before).astype(np.float32)
+        dones = self.done.copy()
+        if self.autoreset and dones.any():
+            self.restart(dones)
+        return self.observe(), rewards, dones
+
+    def apply_input(self, actions, live):
+        left = live & (actions & INPUT_LEFT != 0)
+        right = live & (actions & INPUT_RIGHT != 0)
+        self.x[left] -= player_speed
+        self.facing_right[left] = False
+        self.x[right] += player_speed
+        self.facing_right[right] = True
+
+        # --- Wrap around screen edges ---
+        off_left = live & (self.x + player_width < 0)
+        off_right = live & (self.x > WIDTH)
+        self.x[off_left] = WIDTH
+        self.x[off_right] = -player_width
+
+        jump = live & (actions & INPUT_JUMP != 0) & self.on_ground
+        self.vel_y[jump] = jump_velocity
+        self.on_ground[jump] = False
+
+        first_move = (left | right | jump) & ~self.moved
+        self.moved |= first_move
+        self.move_tick[first_move] = self.tick[first_move]
+
+    def collide_platforms(self, actions, live):
+        # One pass per platform slot, vectorized over games; snapping to a
+        # platform moves the player before the next one is checked, as in
+        # Simulation.collide_platforms.
+        self.on_ground[live] = False
+        dropping = actions & INPUT_DOWN != 0
+        plats = STAGE_PLATFORMS[self.stage_index]
+        present = STAGE_PLATFORM_MASK[self.stage_index]
+        for i in range(plats.shape[1]):
+            px, py, pw, ph = plats[:, i, 0], plats[:, i, 1], plats[:, i, 2], plats[:, i, 3]
+            hit = (live & present[:, i] & (self.vel_y >= 0)
+                   & (self.x < px + pw) & (self.x + player_width > px)
+                   & (self.y < py + ph) & (self.y + player_height > py))
+            elevated = py < HEIGHT - 60
+            land = hit & ~(elevated & dropping)
+            self.y[land] = py[land] - player_height
+            self.vel_y[land] = 0
+            self.on_ground[land] = True
+
+    def clone_positions(self):
+        """(xs, ys, mask), each (n, MAX_CLONES): where every game's clones stand."""
+        # A young clone trails one tick less, as in Simulation.update_clones.
+        # Until the trail is long enough the clone waits at the oldest
+        # sample, which is the spot it spawned on.
+        delays = CLONE_DELAYS[None, :] - (self.tick[:, None] - self.clone_tick < CLONE_DELAYS[None, :])
+        delays = np.minimum(delays, self.trail_count[:, None] - 1)
+        slots = (self.trail_head[:, None] - 1 - delays) % trail_capacity + self.rows[:, None] * trail_capacity
+        mask = np.arange(MAX_CLONES)[None, :] < self.num_clones[:, None]
+        return self.trail_x.take(slots), self.trail_y.take(slots), mask
+
+    def update_clones(self, live):
+        # --- Trail recording ---
+        recording = live & self.moved
+        rows = self.rows[recording]
+        heads = self.trail_head[recording]
+        self.trail_x[rows, heads] = self.x[recording]
+        self.trail_y[rows, heads] = self.y[recording]
+        self.trail_head[recording] = (heads + 1) % trail_capacity
+        self.trail_count[recording] = np.minimum(self.trail_count[recording] + 1, trail_capacity)
+
+        # --- Clone spawning ---
+        first = (recording & (self.num_clones == 0)
+                 & (self.tick - self.move_tick >= self.ms_to_ticks(self.clone_spawn_delay)))
+        self.num_clones[first] = 1
+        self.clone_tick[first, 0] = self.tick[first]
+        threshold = self.score // self.clone_score_step
+        more = live & (threshold > self.last_threshold) & (self.num_clones > 0)
+        self.last_threshold[more] = threshold[more]
+        self.num_clones[more] += 1
+        rows = self.rows[more & (self.num_clones <= MAX_CLONES)]
+        self.clone_tick[rows, self.num_clones[rows] - 1] = self.tick[rows]
+
+        # --- Clone collision ---
+        xs, ys, mask = self.clone_positions()
+        touching = (mask & (np.abs(xs - self.x[:, None]) < player_width)
+                    & (np.abs(ys - self.y[:, None]) < player_height)).any(axis=1)
+        self.done |= live & touching & ~self.invincible
+
+    def collect_coins(self, live):
+        coins = STAGE_COINS[self.stage_index]
+        cx, cy = coins[:, :, 0], coins[:, :, 1]
+        hit = (live[:, None] & self.coin_alive
+               & (self.x[:, None] < cx + COIN_SIZE) & (self.x[:, None] + player_width > cx)
+               & (self.y[:, None] < cy + COIN_SIZE) & (self.y[:, None] + player_height > cy))
+        self.score += (hit & ~self.coin_blue).sum(axis=1)
+        powered = (hit & self.coin_blue).any(axis=1)
+        self.invincible |= powered
+        self.invincible_tick[powered] = self.tick[powered]
+        self.coin_alive &= ~hit
+
+        # --- Update invincibility ---
+        timeout = self.ms_to_ticks(self.invincible_duration)
+        expired = live & self.invincible & (self.tick - self.invincible_tick >= timeout)
+        self.invincible[expired] = False
+
+    def advance_stages(self, live):
+        cleared = live & ~self.coin_alive.any(axis=1)
+        if cleared.any():
+            # A random stage other than the current one.
+            pick = self.rng.integers(0, len(stages) - 1, size=int(cleared.sum()))
+            current = self.stage_index[cleared]
+            self.load_stages(cleared, pick + (pick >= current), self.stage_blue_odds)
+
+    def observe(self):
+        """Observations as a dict of arrays, one row per game.
+
+        ``player``: (n, 4) x, y, vel_y, on_ground; ``clones``: (n, MAX_CLONES, 2)
+        positions with ``clone_mask``; ``coins``: (n, C, 3) x, y, is_blue with
+        ``coin_mask``; plus per-game ``invincible``, ``stage`` and ``score``.
+        """
+        xs, ys, clone_mask = self.clone_positions()
+        coins = STAGE_COINS[self.stage_index]
+        return {
+            "player": np.stack([self.x, self.y, self.vel_y, self.on_ground.astype(np.int32)], axis=1),
+            "clones": np.stack([xs, ys], axis=2),
+            "clone_mask": clone_mask,
+            "coins": np.stack([coins[:, :, 0], coins[:, :, 1], self.coin_blue.astype(np.int32)], axis=2),
+            "coin_mask": self.coin_alive.copy(),
+            "invincible": self.invincible.copy(),
+            "stage": self.stage_index.copy(),
+            "score": self.score.copy(),
+        }
+
+
+if __name__ == "__main__":
+    # Throughput check: python batch_env.py [games] [ticks]
+    import time
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    env = BatchEnv(n, seed=0)
+    policy = np.random.default_rng(0)
+    choices = np.array([INPUT_RIGHT, INPUT_RIGHT | INPUT_JUMP, INPUT_LEFT, INPUT_LEFT | INPUT_JUMP, 0],
+                       dtype=np.uint8)
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        obs, rewards, dones = env.step(policy.choice(choices, size=n))
+        episodes += int(dones.sum())
+    elapsed = time.perf_counter() - start
+    print(f"{n} games x {ticks} ticks in {elapsed:.2f}s ({n * ticks / elapsed:.0f} game-ticks/s), "
+          f"{episodes} games over")
@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import pygame
+from simulation import TICK_RATE, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_DOWN, Simulation, trail_capacity
+from profiler import percentile
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ---------------- Benchmark Harness ----------------
+# Runs the real Game2.py loop (simulation + rendering) under SDL's dummy
+# drivers with scripted input, one scenario per child process so peak RSS
+# is per scenario. Results are written to the current directory:
+#
+#   python bench.py                          # all scenarios -> bench_results.json
+#   python bench.py clones-50 --quick        # a subset, 10x shorter
+#   python bench.py --compare baseline.json  # exit 1 on regressions
+#
+# Every scenario also records how long Game2 took to put its first frame on
+# screen and to finish loading; a first frame over Game2.STARTUP_BUDGET_MS
+# fails the run as well.
+
+WARMUP_FRAMES = 30  # asset caches fill in here; not measured
+
+SCENARIOS = {
+    "clones-1": {"clones": 1, "frames": 3600},
+    "clones-10": {"clones": 10, "frames": 3600},
+    "clones-50": {"clones": 50, "frames": 3600},
+    "clones-200": {"clones": 200, "frames": 3600},
+    "long-session": {"clones": 0, "frames": 30 * 60 * 60},  # 30 minutes of game time, clones spawn normally
+    "invincible": {"clones": 10, "frames": 3600, "invincible": True},
+    "stage-rush": {"clones": 10, "frames": 3600, "stage_every": 30},
+}
+
+
+def scripted_inputs(tick):
+    """Deterministic play: run back and forth, hop often, drop through platforms now and then."""
+    inputs = INPUT_RIGHT if tick % 480 < 240 else INPUT_LEFT
+    if tick % 45 < 3:
+        inputs |= INPUT_JUMP
+    if 100 <= tick % 300 < 110:
+        inputs |= INPUT_DOWN
+    return inputs
+
+
+class ScriptedKeys:
+    """Stands in for pygame.key.get_pressed() and reports scripted_inputs()."""
+
+    key_bits = {pygame.K_LEFT: INPUT_LEFT, pygame.K_RIGHT: INPUT_RIGHT,
+                pygame.K_SPACE: INPUT_JUMP, pygame.K_DOWN: INPUT_DOWN}
+
+    def __init__(self):
+        self.frame = 0
+
+    def __call__(self):
+        return self
+
+    def __getitem__(self, key):
+        if self.frame == 0:
+            return key == pygame.K_SPACE  # leave the start screen
+        return bool(scripted_inputs(self.frame) & self.key_bits.get(key, 0))
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS, KiB elsewhere
+
+
+def run_scenario(name, scale=1.0):
+    """Run one scenario in this process and return its measurements."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import Game2  # opens the (dummy) window and starts loading assets
+    Game2.main(max_frames=1)  # the first start-screen frame, as a player would see it
+    Game2.load_assets()  # the scripted run starts on frame 0, so wait for the rest here
+
+    spec = SCENARIOS[name]
+    frames = max(WARMUP_FRAMES + 1, int(spec["frames"] * scale))
+    keys = ScriptedKeys()
+    sim = Simulation(seed=1)
+    sim.clones_catch_player = False
+    frame_times = []
+    last = [0]
+
+    def on_frame(frame, sim):
+        now = time.perf_counter_ns()
+        if frame > WARMUP_FRAMES:
+            frame_times.append(now - last[0])
+        keys.frame = frame
+        if frame == 1:  # the start screen has just reset the run
+            sim.reset(seed=1)
+            if spec["clones"]:
+                # Fill the trail first so every clone is already replaying a path.
+                for tick in range(trail_capacity):
+                    sim.step(scripted_inputs(tick))
+                for i in range(spec["clones"]):
+                    sim.spawn_clone((i + 1) * (trail_capacity - 1) // spec["clones"])
+        if spec.get("invincible"):
+            sim.invincible = True
+            sim.invincible_timer = sim.tick
+        if spec.get("stage_every") and frame % spec["stage_every"] == 0:
+            sim.stage_coins.clear()  # empties collectibles too: forces a stage transition on the next tick
+        last[0] = time.perf_counter_ns()
+
+    start = time.perf_counter()
+    Game2.main(sim=sim, get_keys=keys, frame_ms=1000 / TICK_RATE, max_frames=frames, on_frame=on_frame)
+    elapsed = time.perf_counter() - start
+    Game2.highscores.close()
+
+    frame_times.sort()
+    measured = sum(frame_times) / 1e9
+    return {
+        "frames": len(frame_times),
+        "fps": len(frame_times) / measured if measured else None,
+        "p50_ms": percentile(frame_times, 50) / 1e6,
+        "p95_ms": percentile(frame_times, 95) / 1e6,
+        "p99_ms": percentile(frame_times, 99) / 1e6,
+        "max_ms": frame_times[-1] / 1e6,
+        "wall_s": elapsed,
+        "peak_rss_kb": peak_rss_kb(),
+        "clones": len(sim.clones),
+        "ticks": sim.tick,
+        "startup_ms": Game2.startup_ms,
+        "ready_ms": Game2.ready_ms,
+        "startup_budget_ms": Game2.STARTUP_BUDGET_MS,
+    }
+
+
+def run_isolated(name, scale):
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, "--scale", str(scale)],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"scenario {name} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def over_budget(result):
+    return result.get("startup_ms", 0) > result.get("startup_budget_ms", float("inf"))
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table; return the names of regressed scenarios."""
+    regressions = []
+    print(f"{'scenario':<14}{'fps':>10}{'base':>10}{'p95 ms':>10}{'base':>10}{'rss MB':>9}{'base':>9}")
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:<14}{new['fps']:>10.0f}{'-':>10}{new['p95_ms']:>10.2f}{'-':>10}")
+            continue
+        new_rss = (new["peak_rss_kb"] or 0) / 1024
+        old_rss = (old["peak_rss_kb"] or 0) / 1024
+        slower = new["fps"] < old["fps"] * (1 - tolerance) or new["p95_ms"] > old["p95_ms"] * (1 + tolerance)
+        flag = "  REGRESSION" if slower else ""
+        if slower:
+            regressions.append(name)
+        print(f"{name:<14}{new['fps']:>10.0f}{old['fps']:>10.0f}{new['p95_ms']:>10.2f}{old['p95_ms']:>10.2f}"
+              f"{new_rss:>9.1f}{old_rss:>9.1f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Shadow Chase benchmarks.")
+    parser.add_argument("scenarios", nargs="*", help=f"default: all of {', '.join(SCENARIOS)}")
+    parser.add_argument("--out", default="bench_results.json", help="where to write the results")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging (0.10 = 10%%)")
+    parser.add_argument("--quick", action="store_true", help="run every scenario at a tenth of its length")
+    parser.add_argument("--scale", type=float, default=1.0, help=argparse.SUPPRESS)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.scale)))
+        return 0
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    scale = 0.1 if args.quick else args.scale
+
+    results = {}
+    for name in names:
+        results[name] = run_isolated(name, scale)
+        r = results[name]
+        print(f"{name:<14}{r['fps']:8.0f} fps  p50 {r['p50_ms']:.2f}  p95 {r['p95_ms']:.2f}  "
+              f"p99 {r['p99_ms']:.2f} ms  peak RSS {(r['peak_rss_kb'] or 0) / 1024:.1f} MB  "
+              f"first frame {r['startup_ms']:.0f} ms (ready {r['ready_ms']:.0f})"
+              f"{'  OVER BUDGET' if over_budget(r) else ''}", flush=True)
+
+    with open(args.out, "w") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "scenarios": results,
+        }, f, indent=2)
+
+    status = 0
+    slow_starts = [name for name, r in results.items() if over_budget(r)]
+    if slow_starts:
+        print(f"first frame over the {results[slow_starts[0]]['startup_budget_ms']} ms startup budget: "
+              f"{', '.join(slow_starts)}")
+        status = 1
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["scenarios"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"regressed: {', '.join(regressions)}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
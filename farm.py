@@ -0,0 +1,227 @@
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from simulation import HEIGHT, TICK_RATE, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_DOWN, stages, Simulation
+from bench import scripted_inputs
+
+# ---------------- Simulation Farm ----------------
+# Plays many seeded headless runs across every core and reports, per entry
+# in ``stages``, how long players last, how many coins they get and where
+# clones catch them. Balancing knobs are Simulation's class attributes and
+# can be set or swept from the command line:
+#
+#   python farm.py --runs 2000 --policy seeker
+#   python farm.py --runs 500 --sweep stage_blue_odds=0,0.08,0.2
+#   python farm.py --set invincible_duration=3000 --json farm.json
+
+KNOBS = ("invincible_duration", "clone_spawn_delay", "clone_score_step", "start_blue_odds", "stage_blue_odds")
+HEATMAP_CELL = 100  # px; catch locations are counted per cell
+
+
+# ---------------- Policies ----------------
+# A policy is called once per tick with the simulation and its own
+# random.Random and returns an INPUT_* bitmask.
+
+def random_policy(sim, rng):
+    return rng.choice((INPUT_RIGHT, INPUT_RIGHT | INPUT_JUMP, INPUT_LEFT, INPUT_LEFT | INPUT_JUMP, 0))
+
+
+def scripted_policy(sim, rng):
+    """The script bench.py plays, so balancing and benchmarks see the same runs."""
+    return scripted_inputs(sim.tick)
+
+
+def seeker_policy(sim, rng):
+    """Head for the nearest coin, jumping up to it or dropping down to it."""
+    player = sim.player_rect
+    if not sim.collectibles:
+        return 0
+    target = min(sim.collectibles, key=lambda coin: abs(coin.rect.centerx - player.centerx)
+                 + abs(coin.rect.centery - player.centery)).rect
+    inputs = 0
+    if target.centerx < player.centerx - 10:
+        inputs |= INPUT_LEFT
+    elif target.centerx > player.centerx + 10:
+        inputs |= INPUT_RIGHT
+    if target.bottom < player.top and rng.random() < 0.5:
+        inputs |= INPUT_JUMP
+    elif target.top > player.bottom:
+        inputs |= INPUT_DOWN
+    return inputs
+
+
+POLICIES = {"random": random_policy, "scripted": scripted_policy, "seeker": seeker_policy}
+
+
+# ---------------- Runs ----------------
+def play_run(job):
+    """Play one seeded run to its end and return its statistics (runs in a worker)."""
+    seed, policy_name, knobs, max_ticks = job
+    sim = Simulation(seed=seed)
+    for name, value in knobs.items():
+        setattr(sim, name, value)
+    sim.reset(seed=seed)  # reload the first stage with the overridden blue odds
+    policy = POLICIES[policy_name]
+    rng = random.Random(seed)
+
+    n = len(stages)
+    ticks = [0] * n
+    visits = [0] * n
+    coins = [0] * n
+    blue = [0] * n
+    visits[sim.stage_index] += 1
+    outcome = "timeout"
+    catch = None
+    while sim.tick < max_ticks:
+        stage = sim.stage_index
+        score = sim.score
+        events = sim.step(policy(sim, rng))
+        ticks[stage] += 1
+        if "coin" in events:
+            picked = events.count("coin")
+            coins[stage] += picked
+            blue[stage] += picked - (sim.score - score)  # blue coins don't score
+        if "level" in events:
+            visits[sim.stage_index] += 1
+        if sim.game_over:
+            outcome = "caught"
+            catch = (stage, sim.player_rect.centerx, sim.player_rect.centery)
+            break
+        if sim.player_rect.top > HEIGHT:  # slipped through the wrap gap
+            outcome = "fell"
+            break
+    return {
+        "seed": seed,
+        "outcome": outcome,
+        "ticks": sim.tick,
+        "score": sim.score,
+        "clones": len(sim.clones),
+        "stage_ticks": ticks,
+        "stage_visits": visits,
+        "stage_coins": coins,
+        "stage_blue": blue,
+        "catch": catch,
+    }
+
+
+def mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+def aggregate(results):
+    """Fold per-run results into overall and per-stage statistics."""
+    n = len(stages)
+    outcomes = Counter(r["outcome"] for r in results)
+    survival = sorted(r["ticks"] / TICK_RATE for r in results)
+    with_blue = [r["ticks"] / TICK_RATE for r in results if sum(r["stage_blue"])]
+    without_blue = [r["ticks"] / TICK_RATE for r in results if not sum(r["stage_blue"])]
+    per_stage = []
+    for s in range(n):
+        seconds = sum(r["stage_ticks"][s] for r in results) / TICK_RATE
+        visits = sum(r["stage_visits"][s] for r in results)
+        catches = [r["catch"] for r in results if r["catch"] and r["catch"][0] == s]
+        heatmap = Counter((x // HEATMAP_CELL, y // HEATMAP_CELL) for _, x, y in catches)
+        per_stage.append({
+            "stage": s + 1,
+            "visits": visits,
+            "seconds": seconds,
+            "coins_per_visit": sum(r["stage_coins"][s] for r in results) / visits if visits else 0.0,
+            "blue_per_visit": sum(r["stage_blue"][s] for r in results) / visits if visits else 0.0,
+            "catches": len(catches),
+            "catches_per_minute": len(catches) / (seconds / 60) if seconds else 0.0,
+            "catch_cells": {f"{cx * HEATMAP_CELL},{cy * HEATMAP_CELL}": count
+                            for (cx, cy), count in heatmap.most_common()},
+        })
+    return {
+        "runs": len(results),
+        "outcomes": dict(outcomes),
+        "survival_s": {
+            "mean": mean(survival),
+            "p50": survival[len(survival) // 2] if survival else 0.0,
+            "p90": survival[len(survival) * 9 // 10] if survival else 0.0,
+        },
+        "mean_score": mean([r["score"] for r in results]),
+        "mean_clones": mean([r["clones"] for r in results]),
+        "survival_with_blue_s": mean(with_blue),
+        "survival_without_blue_s": mean(without_blue),
+        "runs_with_blue": len(with_blue),
+        "stages": per_stage,
+    }
+
+
+def print_report(label, stats):
+    survival = stats["survival_s"]
+    outcomes = ", ".join(f"{name} {count}" for name, count in sorted(stats["outcomes"].items()))
+    print(f"== {label}: {stats['runs']} runs ({outcomes})")
+    print(f"   survival mean {survival['mean']:.1f}s  p50 {survival['p50']:.1f}s  p90 {survival['p90']:.1f}s  "
+          f"score {stats['mean_score']:.2f}  clones {stats['mean_clones']:.2f}")
+    print(f"   with a blue coin {stats['survival_with_blue_s']:.1f}s ({stats['runs_with_blue']} runs)  "
+          f"without {stats['survival_without_blue_s']:.1f}s")
+    print(f"   {'stage':<7}{'visits':>8}{'time s':>10}{'coins/v':>9}{'blue/v':>8}{'caught':>8}{'/min':>7}"
+          "  top catch cells")
+    for s in stats["stages"]:
+        cells = "  ".join(f"({cell}) {count}" for cell, count in list(s["catch_cells"].items())[:3])
+        print(f"   {s['stage']:<7}{s['visits']:>8}{s['seconds']:>10.0f}{s['coins_per_visit']:>9.2f}"
+              f"{s['blue_per_visit']:>8.2f}{s['catches']:>8}{s['catches_per_minute']:>7.2f}  {cells}")
+
+
+def parse_value(text):
+    return float(text) if "." in text else int(text)
+
+
+def parse_knob(text):
+    name, _, value = text.partition("=")
+    if name not in KNOBS or not value:
+        raise argparse.ArgumentTypeError(f"expected KNOB=VALUE with KNOB one of {', '.join(KNOBS)}")
+    return name, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many headless Shadow Chase runs for balancing.")
+    parser.add_argument("--runs", type=int, default=1000, help="runs per configuration")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; runs use seed, seed+1, ...")
+    parser.add_argument("--policy", choices=POLICIES, default="seeker")
+    parser.add_argument("--minutes", type=float, default=5, help="stop a run after this much game time")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--set", type=parse_knob, action="append", default=[], metavar="KNOB=VALUE",
+                        help=f"override a knob for every run; knobs: {', '.join(KNOBS)}")
+    parser.add_argument("--sweep", type=parse_knob, metavar="KNOB=V1,V2,...",
+                        help="repeat the whole batch once per value")
+    parser.add_argument("--json", metavar="PATH", help="also write the aggregated statistics here")
+    args = parser.parse_args()
+
+    base = {name: parse_value(value) for name, value in args.set}
+    configs = [("defaults" if not base else " ".join(f"{k}={v}" for k, v in base.items()), base)]
+    if args.sweep:
+        name, values = args.sweep
+        configs = []
+        for value in values.split(","):
+            knobs = dict(base, **{name: parse_value(value)})
+            configs.append((" ".join(f"{k}={v}" for k, v in knobs.items()), knobs))
+    max_ticks = int(args.minutes * 60 * TICK_RATE)
+
+    report = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for label, knobs in configs:
+            jobs = [(args.seed + i, args.policy, knobs, max_ticks) for i in range(args.runs)]
+            start = time.perf_counter()
+            results = list(pool.map(play_run, jobs, chunksize=max(1, args.runs // 64)))
+            elapsed = time.perf_counter() - start
+            stats = aggregate(results)
+            stats.update(label=label, knobs=knobs, policy=args.policy, elapsed_s=elapsed)
+            print_report(label, stats)
+            print(f"   {sum(r['ticks'] for r in results) / elapsed:.0f} ticks/s over {elapsed:.1f}s\n")
+            report.append(stats)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cell_px": HEATMAP_CELL, "configs": report}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
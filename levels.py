@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import zlib
+import struct
+import hashlib
+import tempfile
+from array import array
+import pygame
+
+# ---------------- Level Files ----------------
+# Stages live in levels/*.json, loaded in file-name order:
+#
+#   {"name": "Stage 1", "platforms": [[x, y, w, h], ...]}
+#
+# The first platform is the floor. Each file is compiled once, meaning it
+# is validated, the game rules in simulation.compile_stage run on it, and
+# its platforms are baked into an RGBA overlay. The result goes to
+# levels/cache/<file>.stage. The cache is keyed by a hash of the level
+# file, the platform texture and the rules version, so editing any of
+# them recompiles on the next start. `python levels.py` compiles
+# everything up front (e.g. as a build step).
+LEVEL_DIR = "levels"
+TEXTURE_PATH = os.path.join("assets", "platform.png")
+CACHE_MAGIC = b"SCLC"
+CACHE_VERSION = 1
+# magic, version, key, then lengths: name bytes, platform/coin ints,
+# platform/coin grid ints, then the overlay's x/y/width/height/compressed bytes
+CACHE_HEADER = struct.Struct("<4sB32sIIIIIIIIII")
+
+
+def resource_path(relative_path):
+    """Path next to this module (or inside the PyInstaller bundle), whatever the working directory.
+
+    The one resolver for game files: Game2 loads its assets through it, so
+    the texture baked into cached overlays is the one the game draws with.
+    """
+    try:
+        base_path = sys._MEIPASS
+    except AttributeError:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, relative_path)
+
+
+def read_level(path, width, height):
+    """Parse and validate a level file; returns (name, [(x, y, w, h), ...])."""
+    try:
+        with open(path) as f:
+            level = json.load(f)
+    except ValueError as e:
+        raise ValueError(f"{path}: not valid JSON ({e})")
+    if not isinstance(level, dict) or not isinstance(level.get("platforms"), list):
+        raise ValueError(f"{path}: expected an object with a \"platforms\" list")
+    name = level.get("name", os.path.splitext(os.path.basename(path))[0])
+    if not isinstance(name, str):
+        raise ValueError(f"{path}: \"name\" must be a string")
+    platforms = []
+    for i, plat in enumerate(level["platforms"]):
+        if (not isinstance(plat, list) or len(plat) != 4
+                or not all(isinstance(v, int) and not isinstance(v, bool) for v in plat)):
+            raise ValueError(f"{path}: platform {i} must be [x, y, w, h] integers")
+        x, y, w, h = plat
+        if w <= 0 or h <= 0:
+            raise ValueError(f"{path}: platform {i} has no area")
+        if x + w <= 0 or x >= width or y < 0 or y >= height:
+            raise ValueError(f"{path}: platform {i} is off screen")
+        platforms.append((x, y, w, h))
+    if not platforms or platforms[0][:3] != (0, height - 50, width):
+        raise ValueError(f"{path}: platform 0 must be the floor [0, {height - 50}, {width}, h]")
+    if len(platforms) < 2:
+        raise ValueError(f"{path}: needs at least one platform above the floor to hold a coin")
+    return name, platforms
+
+
+def bake_overlay(platforms, width, height, texture):
+    """Textured platforms (floor excluded), cropped to where they are drawn.
+
+    Returns (x, y, w, h, zlib-compressed RGBA bytes).
+    """
+    tex_w, tex_h = texture.get_size()
+    tiles = [pygame.Rect(x, y, tex_w, tex_h)
+             for x0, y0, w, h in platforms[1:]  # floor is part of the background
+             for x in range(x0, x0 + w, tex_w)
+             for y in range(y0, y0 + h, tex_h)]
+    bounds = tiles[0].unionall(tiles).clip(pygame.Rect(0, 0, width, height))
+    overlay = pygame.Surface(bounds.size, pygame.SRCALPHA)
+    for tile in tiles:
+        # MAX onto a cleared surface copies the texel as is, so the overlay
+        # composites onto the background exactly like the texture would.
+        overlay.blit(texture, (tile.x - bounds.x, tile.y - bounds.y), special_flags=pygame.BLEND_RGBA_MAX)
+    return bounds.x, bounds.y, bounds.w, bounds.h, zlib.compress(pygame.image.tobytes(overlay, "RGBA"))
+
+
+def pack_cells(cells):
+    """Flatten a {(cx, cy): [keys]} grid into int32s: cx, cy, count, keys..."""
+    flat = array("i")
+    for (cx, cy), keys in sorted(cells.items()):
+        flat.extend((cx, cy, len(keys)))
+        flat.extend(keys)
+    return flat
+
+
+def unpack_cells(flat):
+    cells = {}
+    i = 0
+    while i < len(flat):
+        cx, cy, count = flat[i:i + 3]
+        cells[cx, cy] = list(flat[i + 3:i + 3 + count])
+        i += 3 + count
+    return cells
+
+
+def flatten(rects):
+    flat = array("i")
+    for rect in rects:
+        flat.extend(rect)
+    return flat
+
+
+def write_cache(path, key, compiled):
+    name = compiled["name"].encode()
+    arrays = [flatten(compiled["platforms"]), flatten(compiled["coins"]),
+              pack_cells(compiled["platform_cells"]), pack_cells(compiled["coin_cells"])]
+    overlay_x, overlay_y, overlay_w, overlay_h, overlay = compiled["overlay"] or (0, 0, 0, 0, b"")
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # A temp file of our own in the same directory, renamed over the cache
+    # in one step: concurrent writers don't share it, and a reader opens
+    # either the previous cache or a complete new one.
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+        try:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, key, len(name), *(len(a) for a in arrays),
+                                      overlay_x, overlay_y, overlay_w, overlay_h, len(overlay)))
+            f.write(name)
+            for a in arrays:
+                a.tofile(f)
+            f.write(overlay)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.unlink(f.name)
+        raise
+
+
+def read_cache(path, key):
+    """The compiled level cached at ``path``, or None if it is missing, stale or truncated."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < CACHE_HEADER.size:
+        return None
+    magic, version, cached_key, name_len, *lengths, overlay_x, overlay_y, overlay_w, overlay_h, overlay_len = \
+        CACHE_HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or cached_key != key:
+        return None
+    if CACHE_HEADER.size + name_len + 4 * sum(lengths) + overlay_len > len(data):
+        return None  # truncated (e.g. by a crash before the data reached the disk)
+    offset = CACHE_HEADER.size
+    name = data[offset:offset + name_len].decode()
+    offset += name_len
+    arrays = []
+    for length in lengths:
+        a = array("i")
+        a.frombytes(data[offset:offset + 4 * length])
+        arrays.append(a)
+        offset += 4 * length
+    platforms, coins, platform_cells, coin_cells = arrays
+    return {
+        "name": name,
+        "platforms": [tuple(platforms[i:i + 4]) for i in range(0, len(platforms), 4)],
+        "coins": [tuple(coins[i:i + 4]) for i in range(0, len(coins), 4)],
+        "platform_cells": unpack_cells(platform_cells),
+        "coin_cells": unpack_cells(coin_cells),
+        "overlay": ((overlay_x, overlay_y, overlay_w, overlay_h, data[offset:offset + overlay_len])
+                    if overlay_len else None),
+    }
+
+
+def load_levels(compile_stage, rules_version, width, height, directory=None):
+    """Compiled levels for every level file, from the cache where it is current.
+
+    ``compile_stage(platforms)`` returns the game-rule half of a compiled
+    level ("coins", "platform_cells", "coin_cells"); bumping
+    ``rules_version`` invalidates every cached level.
+    """
+    directory = directory or resource_path(LEVEL_DIR)
+    cache_dir = os.path.join(directory, "cache")
+    try:
+        with open(resource_path(TEXTURE_PATH), "rb") as f:
+            texture_bytes = f.read()
+    except OSError:
+        texture_bytes = b""  # headless checkout without assets: compile without the overlay
+    texture = None
+    levels = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(".json"):
+            continue
+        path = os.path.join(directory, file_name)
+        with open(path, "rb") as f:
+            source = f.read()
+        key = hashlib.sha256(source + texture_bytes + f"|{rules_version}|{width}x{height}".encode()).digest()
+        cache_path = os.path.join(cache_dir, file_name[:-len(".json")] + ".stage")
+        compiled = read_cache(cache_path, key)
+        if compiled is None:
+            name, platforms = read_level(path, width, height)
+            compiled = dict(compile_stage(platforms), name=name, platforms=platforms, overlay=None)
+            if texture_bytes:
+                if texture is None:
+                    texture = pygame.image.load(resource_path(TEXTURE_PATH))
+                compiled["overlay"] = bake_overlay(platforms, width, height, texture)
+            try:
+                write_cache(cache_path, key, compiled)
+            except OSError:
+                pass  # read-only install: compile again next time
+        levels.append(compiled)
+    if not levels:
+        raise ValueError(f"{directory}: no level files")
+    return levels
+
+
+def overlay_surface(overlay):
+    """A compiled level's baked platforms as (surface, position)."""
+    x, y, width, height, pixels = overlay
+    return pygame.image.frombuffer(zlib.decompress(pixels), (width, height), "RGBA"), (x, y)
+
+
+if __name__ == "__main__":
+    # Build step: python levels.py  (compiles every level file into levels/cache)
+    from simulation import stages
+    for stage in stages:
+        print(f"{stage['name']}: {len(stage['platforms'])} platforms, {len(stage['collectibles'])} coins, "
+              f"overlay {'baked' if stage['overlay'] else 'missing (no texture)'}")
@@ -0,0 +1,55 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# ---------------- Background Asset Loading ----------------
+# Decoding, scaling, font lookups and the database open run on a thread
+# pool while the start screen is already up. What a job produces is handed
+# to its ``install`` callback on the main thread (where surfaces are
+# converted for the display and module globals are assigned), strictly in
+# the order the jobs were added, so a later install can rely on an earlier
+# one.
+
+
+class AssetLoader:
+    """Runs ``load`` jobs on worker threads and installs their results on the main thread."""
+
+    def __init__(self, workers=4):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-loader")
+        self.jobs = []  # (future, install), oldest first
+        self.total = 0
+        self.installed = 0
+
+    def add(self, load=None, install=None):
+        """Queue ``load()`` on the pool; ``install(result)`` runs later on the main thread.
+
+        Without ``load`` the job is a main-thread step that runs once every
+        job before it has been installed.
+        """
+        if load is None:
+            future = Future()
+            future.set_result(None)
+        else:
+            future = self.pool.submit(load)
+        self.jobs.append((future, install))
+        self.total += 1
+
+    def background(self, job):
+        """Run ``job()`` on the pool without holding up readiness (warm-ups such as sound decoding)."""
+        self.pool.submit(job)
+
+    def poll(self, block=False):
+        """Install every finished job (all of them if ``block``); True once nothing is left."""
+        while self.jobs and (block or self.jobs[0][0].done()):
+            future, install = self.jobs.pop(0)
+            result = future.result()  # re-raises a failed load here, on the main thread
+            if install:
+                install(result)
+            self.installed += 1
+        return not self.jobs
+
+    def wait(self):
+        self.poll(block=True)
+        self.pool.shutdown(wait=False)
+
+    @property
+    def progress(self):
+        return self.installed / self.total if self.total else 1.0
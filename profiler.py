@@ -0,0 +1,144 @@
+import csv
+import json
+import time
+from array import array
+from collections import deque
+import pygame
+
+# ---------------- Frame Profiler ----------------
+# Sections are timed back to back: mark(name) charges everything since the
+# previous mark to ``name``, so a frame's sections add up to the frame.
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, len(sorted_values) * pct // 100)]
+
+
+class FrameProfiler:
+    """Per-section frame timings with a rolling p50/p95/p99 overlay.
+
+    Every completed frame is also kept as one row of a trace (nanoseconds
+    per section, stored in ``array('q')`` columns) that ``dump`` writes
+    out as CSV or JSON.
+    """
+
+    def __init__(self, sections=(), window=600, refresh=30):
+        self.enabled = False
+        self.window = window  # frames the percentiles are computed over
+        self.refresh = refresh  # overlay is re-rendered every this many frames
+        self.sections = list(sections) + ["total"]  # fixes the column order
+        self.recent = {section: deque(maxlen=window) for section in self.sections}
+        self.trace = {section: array("q") for section in self.sections}
+        self.current = {}
+        self.frames = 0
+        self.last = 0
+        self.frame_start = 0
+        self.overlay = None
+        self.font = None
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self.current = dict.fromkeys(self.sections, 0)
+        self.frame_start = self.last = time.perf_counter_ns()
+
+    def mark(self, section):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        if section not in self.current:
+            self.current[section] = 0
+        self.current[section] += now - self.last
+        self.last = now
+
+    def end_frame(self, keep=True):
+        """Close the frame; ``keep=False`` drops it (e.g. menu frames)."""
+        if not self.enabled or not keep:
+            return
+        self.current["total"] = self.last - self.frame_start
+        for section, ns in self.current.items():
+            if section not in self.recent:
+                self.sections.append(section)
+                self.recent[section] = deque(maxlen=self.window)
+                self.trace[section] = array("q", [0]) * self.frames  # absent in earlier frames
+            self.recent[section].append(ns)
+            self.trace[section].append(ns)
+        for section in self.sections:
+            if section not in self.current:
+                self.recent[section].append(0)
+                self.trace[section].append(0)
+        self.frames += 1
+        if self.frames % self.refresh == 0:
+            self.overlay = None
+
+    def summary(self):
+        """{section: (p50, p95, p99)} in nanoseconds over the rolling window."""
+        stats = {}
+        for section in self.sections:
+            values = sorted(self.recent[section])
+            stats[section] = tuple(percentile(values, pct) for pct in (50, 95, 99))
+        return stats
+
+    def draw(self, surface):
+        """Blit the overlay in the top-right corner; returns the area covered."""
+        if not self.frames:
+            return pygame.Rect(0, 0, 0, 0)
+        if self.overlay is None:
+            self.overlay = self.render_overlay()
+        return surface.blit(self.overlay, (surface.get_width() - self.overlay.get_width() - 10, 10))
+
+    def render_overlay(self):
+        if self.font is None:
+            self.font = pygame.font.SysFont("monospace", 14)
+        font = self.font
+        rows = [("section", "p50", "p95", "p99 ms")]
+        for section, stats in self.summary().items():
+            rows.append((section,) + tuple(f"{ns / 1e6:.2f}" for ns in stats))
+        # Columns are laid out by measured width, so a proportional fallback font still lines up.
+        col_widths = [max(font.size(row[col])[0] for row in rows) + 12 for col in range(4)]
+        line_height = font.get_linesize()
+        graph_height = 40
+        width = sum(col_widths) + 10
+        overlay = pygame.Surface((width, line_height * len(rows) + graph_height + 15), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            x = 5
+            for col, text in enumerate(row):
+                label = font.render(text, True, (230, 230, 230))
+                right_align = col_widths[col] - 12 - label.get_width() if col else 0
+                overlay.blit(label, (x + right_align, 5 + i * line_height))
+                x += col_widths[col]
+
+        # Frame-time history: one bar per frame, the dashed line is 16.7 ms.
+        top = 10 + line_height * len(rows)
+        budget_ns = 1e9 / 60
+        totals = list(self.recent["total"])[-(width - 10):]
+        for x, ns in enumerate(totals):
+            h = min(graph_height, int(ns / budget_ns * graph_height / 2))
+            color = (90, 200, 90) if ns <= budget_ns else (220, 80, 60)
+            pygame.draw.line(overlay, color, (5 + x, top + graph_height), (5 + x, top + graph_height - h))
+        for x in range(5, width - 5, 6):
+            pygame.draw.line(overlay, (200, 200, 200), (x, top + graph_height // 2), (x + 2, top + graph_height // 2))
+        return overlay
+
+    def dump(self, path):
+        """Write the full trace to ``path``: JSON if it ends in .json, CSV otherwise."""
+        if not self.frames:
+            return
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({
+                    "unit": "ns",
+                    "sections": self.sections,
+                    "summary": {section: dict(zip(("p50", "p95", "p99"), stats))
+                                for section, stats in self.summary().items()},
+                    "frames": [list(row) for row in zip(*(self.trace[s] for s in self.sections))],
+                }, f)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame"] + [f"{section}_ns" for section in self.sections])
+                for i, row in enumerate(zip(*(self.trace[s] for s in self.sections))):
+                    writer.writerow((i,) + row)
@@ -0,0 +1,118 @@
+import sys
+import mmap
+import struct
+import time
+from array import array
+from simulation import TICK_RATE, Simulation, worlds
+
+# ---------------- Replay File Format ----------------
+# A replay is a seed, the world it was played in and the INPUT_* bitmask
+# held on every simulation tick:
+#
+#   header  "<4sBHQIB"  magic b"SCRP", version, tick rate, seed, tick count, world name length
+#   world   the simulation.worlds name, UTF-8 (empty for the single-screen stages)
+#   body    one unsigned byte of input bits per tick
+#
+# An hour of play is ~216 KB. Readers memory-map the file, so long replays
+# are paged in as they are stepped rather than loaded up front.
+MAGIC = b"SCRP"
+VERSION = 3  # 2: clones trail one tick less while young (Simulation.update_clones); 3: world name
+HEADER = struct.Struct("<4sBHQIB")
+
+
+class ReplayRecorder:
+    """Collects the inputs of one run and writes them as a replay file."""
+
+    def __init__(self, seed, world=None):
+        self.seed = seed
+        self.world = world  # a simulation.worlds name, None for the single-screen stages
+        self.inputs = array("B")
+
+    def record(self, inputs):
+        self.inputs.append(inputs)
+
+    def save(self, path):
+        world = (self.world or "").encode()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, TICK_RATE, self.seed, len(self.inputs), len(world)))
+            f.write(world)
+            self.inputs.tofile(f)
+
+
+class Replay:
+    """A memory-mapped replay file; iterate it for the per-tick inputs."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self.file.close()
+            raise ValueError(f"{path}: not a replay file")
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: not a replay file")
+        magic, version, tick_rate, self.seed, self.ticks, world_len = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a version {VERSION} replay file")
+        if tick_rate != TICK_RATE:
+            self.close()
+            raise ValueError(f"{path}: recorded at {tick_rate} ticks/s, simulation runs at {TICK_RATE}")
+        start = HEADER.size + world_len
+        self.world = self.map[HEADER.size:start].decode() or None
+        if self.world is not None and self.world not in worlds:
+            self.close()
+            raise ValueError(f"{path}: recorded in unknown world {self.world!r}")
+        self.inputs = memoryview(self.map)[start:start + self.ticks]
+
+    def __len__(self):
+        return self.ticks
+
+    def __iter__(self):
+        return iter(self.inputs)
+
+    def close(self):
+        if hasattr(self, "inputs"):
+            self.inputs.release()
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def play(replay, sim=None):
+    """Step ``replay`` through a simulation as fast as possible and return it.
+
+    Stops early if the run ends in a game over, exactly like the recorded one did.
+    A given ``sim`` must be playing the world the replay was recorded in.
+    """
+    world = worlds[replay.world] if replay.world else None
+    if sim is None:
+        sim = Simulation(seed=replay.seed, world=world)
+    elif sim.world is not world:
+        raise ValueError(f"replay was recorded in world {replay.world or 'stages'!r}, not the simulation's")
+    else:
+        sim.reset(seed=replay.seed)
+    for inputs in replay:
+        sim.step(inputs)
+        if sim.game_over:
+            break
+    return sim
+
+
+if __name__ == "__main__":
+    # Headless playback: python replay.py run.replay [...]
+    for path in sys.argv[1:]:
+        with Replay(path) as replay:
+            start = time.perf_counter()
+            sim = play(replay)
+            elapsed = time.perf_counter() - start
+        print(f"{path}: seed {replay.seed}, world {replay.world or 'stages'}, "
+              f"{sim.tick}/{len(replay)} ticks in {elapsed:.3f}s ({sim.tick / max(elapsed, 1e-9):.0f} ticks/s), "
+              f"score {sim.score}, clones {len(sim.clones)}, "
+              f"{'game over' if sim.game_over else 'alive'} at {sim.player_rect.topleft}")
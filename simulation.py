@@ -0,0 +1,717 @@
+import sys
+import random
+import pygame
+from array import array
+from levels import load_levels
+
+# Everything in this module is plain game logic: no display, no assets, no
+# clock. Game2.py renders it; tools can step it as fast as the CPU allows.
+
+# ---------------- World ----------------
+WIDTH, HEIGHT = 1200, 600
+TICK_RATE = 60  # simulation ticks per second of game time
+
+# ---------------- Input Bitmask ----------------
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+INPUT_DOWN = 8
+
+# ---------------- Player ----------------
+player_width, player_height = 60, 90
+jump_velocity = -20
+gravity = 1
+player_speed = 7
+
+# ---------------- Animation Frames ----------------
+# Frames 0-5 are the run cycle, followed by the two jump frames.
+RUN_FRAMES = 6
+JUMP_UP_FRAME, JUMP_DOWN_FRAME = RUN_FRAMES, RUN_FRAMES + 1
+COIN_FRAMES = 5
+coin_frame_speed = 5
+
+# ---------------- Player Trail + Clones ----------------
+trail_horizon_seconds = 60  # how far back clones can replay the player
+clone_delay_frames = int(1.5 * TICK_RATE)  # extra delay added for every clone
+trail_capacity = trail_horizon_seconds * TICK_RATE  # largest clone delay + 1
+
+
+class TrailRing:
+    """Fixed-size ring of player positions shared by every clone.
+
+    Clones don't keep their own copy of the trail; each one reads the
+    position recorded ``delay`` frames ago straight out of this buffer.
+    Every sample is written twice (at ``i`` and ``i + capacity``) so the
+    most recent ``n`` samples are always one contiguous run and
+    ``window`` can hand out memoryviews instead of copies.
+    """
+
+    typecode = "i"  # int32: a player who slips off the floor keeps falling
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.xs = array(self.typecode, [0]) * (2 * capacity)
+        self.ys = array(self.typecode, [0]) * (2 * capacity)
+        self.head = 0  # next slot to write
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def append(self, x, y):
+        head = self.head
+        self.xs[head] = self.xs[head + self.capacity] = x
+        self.ys[head] = self.ys[head + self.capacity] = y
+        self.head = (head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def at(self, delay):
+        """Position from ``delay`` frames ago, clamped to the oldest sample."""
+        if delay >= self.count:
+            delay = self.count - 1
+        i = (self.head - 1 - delay) % self.capacity
+        return self.xs[i], self.ys[i]
+
+    def window(self, n):
+        """Zero-copy (xs, ys) views of the last ``n`` samples, oldest first."""
+        n = min(n, self.count)
+        end = self.head + self.capacity
+        return memoryview(self.xs)[end - n:end], memoryview(self.ys)[end - n:end]
+
+
+class Clone:
+    """A shadow replaying the player's trail ``delay`` ticks behind.
+
+    As in the original game, for its first ``delay`` ticks after ``spawn_tick``
+    it trails one tick less (its copied trail held the newest sample twice),
+    so it stands still for one tick before settling at ``delay``.
+
+    Its position is ``rect`` (it only ever moves to trail samples, so no
+    separate previous position is kept); ``last_pos`` is where it was a
+    tick ago, for interpolation. ``frame`` is the animation frame to draw.
+    Simulations keep the last run's clones for reuse and ``place`` them again.
+    """
+
+    __slots__ = ("rect", "delay", "spawn_tick", "facing_right", "frame", "frame_index", "frame_timer",
+                 "last_pos", "last_dy")
+
+    def __init__(self, x, y, delay, facing_right, spawn_tick=0):
+        self.rect = pygame.Rect(x, y, player_width, player_height)
+        self.place(x, y, delay, facing_right, spawn_tick)
+
+    def place(self, x, y, delay, facing_right, spawn_tick=0):
+        self.rect.topleft = x, y
+        self.delay = delay
+        self.spawn_tick = spawn_tick
+        self.facing_right = facing_right
+        self.frame = 0
+        self.frame_index = 0
+        self.frame_timer = 0
+        self.last_pos = (x, y)
+        self.last_dy = 0
+
+
+# ---------------- Coins ----------------
+class Coin:
+    """A collectible: a (shared, read-only) ``rect``, its ``type`` ("normal" or "blue") and ``spawn_time`` tick.
+
+    Simulations recycle picked-up coins for the next stage or chunk.
+    """
+
+    __slots__ = ("rect", "type", "spawn_time")
+
+    def __init__(self):
+        self.rect = None
+        self.type = "normal"
+        self.spawn_time = 0
+
+
+# ---------------- Spatial Index ----------------
+GRID_CELL = 128  # px; a player overlaps at most 2x2 cells
+
+
+class SpatialGrid:
+    """Uniform-grid broadphase: maps grid cells to the keys of the rects in them.
+
+    ``query`` returns candidate keys in ascending order, so callers that
+    care about order (platform snapping) see rects in the same order as
+    the list they were indexed from. Candidates still need an exact
+    ``colliderect`` check. Results are memoized per cell span until the
+    grid changes, which for platforms is never.
+    """
+
+    def __init__(self, cell=GRID_CELL):
+        self.cell = cell
+        self.cells = {}
+        self.memo = {}
+
+    def cells_of(self, rect):
+        cell = self.cell
+        for cx in range(rect.left // cell, (rect.right - 1) // cell + 1):
+            for cy in range(rect.top // cell, (rect.bottom - 1) // cell + 1):
+                yield cx, cy
+
+    def insert(self, key, rect):
+        for xy in self.cells_of(rect):
+            self.cells.setdefault(xy, []).append(key)
+        self.memo.clear()
+
+    def remove(self, key, rect):
+        for xy in self.cells_of(rect):
+            keys = self.cells[xy]
+            keys.remove(key)
+            if not keys:
+                del self.cells[xy]  # streamed worlds would otherwise pile up empty cells
+        self.memo.clear()
+
+    def clear(self):
+        self.cells.clear()
+        self.memo.clear()
+
+    def query(self, rect):
+        """Sorted keys of every rect sharing a cell with ``rect`` (do not mutate the result)."""
+        cell = self.cell
+        span = (rect.left // cell, (rect.right - 1) // cell, rect.top // cell, (rect.bottom - 1) // cell)
+        keys = self.memo.get(span)
+        if keys is None:
+            x0, x1, y0, y1 = span
+            found = set()
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    found.update(self.cells.get((cx, cy), ()))
+            keys = self.memo[span] = tuple(sorted(found))
+        return keys
+
+
+def index_rects(rects, cell=GRID_CELL):
+    grid = SpatialGrid(cell)
+    for i, rect in enumerate(rects):
+        grid.insert(i, rect)
+    return grid
+
+
+# ---------------- Generate coins 40px above elevated platforms ----------------
+def coins_above(platforms, new_rect=pygame.Rect):
+    collectibles = []
+    for plat in platforms:
+        # skip floor for coins
+        if plat.y == HEIGHT - 50:
+            continue
+        coin_rect = new_rect(
+            plat.centerx - 15,   # center coin horizontally
+            plat.y - 60,         # 60px above platform
+            30, 30
+        )
+        collectibles.append(coin_rect)
+    return collectibles
+
+
+# ---------------- Stages ----------------
+# Layouts come from levels/*.json (see levels.py). The rules below run
+# once per level file at compile time and their output is cached.
+LEVEL_RULES_VERSION = 1  # bump when coins_above, SpatialGrid or GRID_CELL change
+
+
+def compile_stage(platforms):
+    rects = [pygame.Rect(plat) for plat in platforms]
+    coins = coins_above(rects)
+    return {
+        "coins": [tuple(coin) for coin in coins],
+        "platform_cells": index_rects(rects).cells,
+        "coin_cells": index_rects(coins).cells,
+    }
+
+
+def grid_from_cells(cells):
+    grid = SpatialGrid()
+    grid.cells = cells
+    return grid
+
+
+# Stage switches swap in these shared, read-only objects; nothing is copied.
+stages = [{
+    "name": level["name"],
+    "platforms": [pygame.Rect(plat) for plat in level["platforms"]],
+    "collectibles": [pygame.Rect(coin) for coin in level["coins"]],
+    "platform_grid": grid_from_cells(level["platform_cells"]),
+    "coin_grid": grid_from_cells(level["coin_cells"]),
+    "overlay": level["overlay"],  # baked platforms for the renderer, or None
+} for level in load_levels(compile_stage, LEVEL_RULES_VERSION, WIDTH, HEIGHT)]
+# other_stages[i]: where a stage transition from stage i can lead (never straight back to i).
+other_stages = [[i for i in range(len(stages)) if i != j] for j in range(len(stages))]
+
+
+# ---------------- Scrolling Worlds ----------------
+# A world is a level many screens wide, cut into CHUNK_WIDTH strips. Each
+# chunk is a stage-shaped dict ({"platforms", "collectibles"} in world
+# coordinates) built on demand by the world and dropped again once the
+# player is more than STREAM_RADIUS chunks away, so memory and per-tick
+# work follow the player, not the size of the level. Platforms must not
+# cross chunk edges. A dropped chunk's rects go back to the world and are
+# reused for the next chunk built, so streaming doesn't allocate. What the
+# player did to a chunk's coins is kept per run, so streaming changes only
+# memory use, never the game.
+CHUNK_WIDTH = WIDTH
+STREAM_RADIUS = 1  # chunks kept loaded on each side of the player's
+
+
+class World:
+    def __init__(self, name, chunk_count, make_chunk):
+        self.name = name
+        self.chunk_count = chunk_count
+        self.width = chunk_count * CHUNK_WIDTH
+        self.make_chunk = make_chunk  # (index, new_rect) -> stage-shaped dict
+        self.spare_rects = []
+
+    def new_rect(self, x, y, w, h):
+        """A rect for a chunk being built; recycled if one is spare."""
+        if self.spare_rects:
+            rect = self.spare_rects.pop()
+            rect.update(x, y, w, h)
+            return rect
+        return pygame.Rect(x, y, w, h)
+
+    def chunk(self, index):
+        return self.make_chunk(index, self.new_rect)
+
+    def recycle(self, chunk):
+        """Take back the rects of a chunk nothing refers to any more."""
+        self.spare_rects.extend(chunk["platforms"])
+        self.spare_rects.extend(chunk["collectibles"])
+
+
+def stage_tour(screens):
+    """The hand-made stages laid side by side, repeated to ``screens`` chunks."""
+    def make_chunk(index, new_rect):
+        left = index * CHUNK_WIDTH
+        stage = stages[index % len(stages)]
+        platforms = [new_rect(plat.x + left, plat.y, plat.w, plat.h) for plat in stage["platforms"]]
+        return {"platforms": platforms, "collectibles": coins_above(platforms, new_rect)}
+    return World("tour", screens, make_chunk)
+
+
+def generated_world(seed, screens):
+    """Random platforms in the style of the hand-made stages; chunk ``i`` is the same every time."""
+    def make_chunk(index, new_rect):
+        rng = random.Random(seed * 1000003 + index)
+        left = index * CHUNK_WIDTH
+        platforms = [new_rect(left, HEIGHT-50, CHUNK_WIDTH, 60)]  # floor
+        for slot in range(3):
+            x = left + 75 + slot * 375 + rng.randrange(0, 60)
+            platforms.append(new_rect(x, rng.choice((HEIGHT-220, HEIGHT-300, HEIGHT-380)), 240, 30))
+        return {"platforms": platforms, "collectibles": coins_above(platforms, new_rect)}
+    return World(f"generated-{seed}", screens, make_chunk)
+
+
+worlds = {
+    "tour": stage_tour(16),
+    "long": generated_world(1, 1000),
+}
+
+
+# ---------------- Simulation ----------------
+class Simulation:
+    """One game of Shadow Chase, advanced a tick at a time by ``step``.
+
+    The whole game state lives on the instance (player, clones, coins,
+    stage, score) and ``step`` takes the held keys as an ``INPUT_*``
+    bitmask. Time is counted in ticks, never read from a clock, so a
+    simulation runs identically whether it is rendered at 60 FPS or
+    stepped unthrottled in a headless tool.
+
+    Each run draws from its own ``random.Random`` seeded in ``reset``, so
+    a seed plus the per-tick inputs reproduce a run exactly.
+
+    Restarts and stage changes reinitialize this state in place: the
+    containers are kept, and coins and clones that leave play go to a
+    free list for the next ones, so transitions don't allocate.
+    """
+
+    # Balancing knobs; override on an instance to experiment.
+    invincible_duration = 5000  # ms
+    clone_spawn_delay = 1500  # ms after the first move before clone #1 appears
+    clone_score_step = 10  # another clone every this many points
+    start_blue_odds = 0.05
+    stage_blue_odds = 0.08
+    clones_catch_player = True  # False keeps stress runs alive regardless of collisions
+
+    def __init__(self, seed=None, world=None):
+        self.rng = random.Random()
+        self.profiler = None  # set to a profiler.FrameProfiler to time each phase
+        self.world = world  # a World to scroll through instead of single-screen stages
+        self.trail = TrailRing(trail_capacity)
+        self.player_rect = pygame.Rect(0, 0, player_width, player_height)
+        self.clones = []
+        self.spare_clones = []
+        # Coins not yet picked up, by their key in coin_grid; ``collectibles``
+        # is a live view of them in spawn order (the draw order).
+        self.stage_coins = {}
+        self.collectibles = self.stage_coins.values()
+        self.spare_coins = []
+        self.ground_cache = {}  # (x, bottom) -> standing on a platform; clones revisit the player's spots
+        if world is not None:
+            # Platforms and coins are keyed (chunk, slot) so chunks can come and go.
+            self.chunks = {}
+            self.platforms = {}
+            self.platform_grid = SpatialGrid()
+            self.coin_grid = SpatialGrid()
+            # Per run, surviving eviction: the type each coin was rolled as
+            # when its chunk first loaded, and the coins picked up.
+            self.coin_types = {}
+            self.collected = set()
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start a fresh run on a random stage; a new seed is picked if none is given."""
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.tick = 0
+        self.player_rect.topleft = (150, HEIGHT - 150)
+        self.last_player_pos = self.player_rect.topleft  # position one tick ago, for interpolation
+        self.player_vel_y = 0
+        self.on_ground = False
+        self.facing_right = True
+        self.frame_index = 0
+        self.frame_timer = 0
+        self.current_frame = 0
+        self.score = 0
+        self.last_threshold = 0
+        self.trail.clear()
+        self.spare_clones.extend(self.clones)
+        self.clones.clear()
+        self.player_moved = False
+        self.player_move_tick = None
+        self.invincible = False
+        self.invincible_timer = 0
+        self.coin_frame_index = 0
+        self.coin_frame_timer = 0
+        self.game_over = False
+        self.events = []
+        if self.world is not None:
+            self.load_world()
+            return
+        self.world_width = WIDTH
+        self.stage_index = self.rng.randint(0, len(stages) - 1)
+        self.last_stage_index = self.stage_index
+        self.load_stage(self.stage_index, self.start_blue_odds)
+
+    def new_coin(self, rect, blue_odds, coin_type=None):
+        """A coin at ``rect``, blue with ``blue_odds`` unless its ``coin_type`` is already decided."""
+        coin = self.spare_coins.pop() if self.spare_coins else Coin()
+        coin.rect = rect
+        coin.type = coin_type or ("blue" if self.rng.random() < blue_odds else "normal")
+        coin.spawn_time = self.tick
+        return coin
+
+    def load_stage(self, index, blue_odds):
+        # The stage's rects and grids are shared and never mutated; only the
+        # per-run coin state is set up, on recycled coins.
+        stage = stages[index]
+        self.stage_index = index
+        self.platforms = stage["platforms"]
+        self.platform_grid = stage["platform_grid"]
+        self.coin_grid = stage["coin_grid"]
+        self.ground_cache.clear()
+        stage_coins = self.stage_coins
+        self.spare_coins.extend(stage_coins.values())
+        stage_coins.clear()
+        for key, rect in enumerate(stage["collectibles"]):
+            stage_coins[key] = self.new_coin(rect, blue_odds)
+
+    def load_world(self):
+        self.world_width = self.world.width
+        self.stage_index = self.last_stage_index = 0
+        for index in list(self.chunks):  # a restart: drop the last run's chunks
+            self.evict_chunk(index)
+        self.coin_types.clear()
+        self.collected.clear()
+        self.ground_cache.clear()
+        self.stream()
+
+    def stream(self):
+        """Load the chunks around the player and drop the rest."""
+        center = min(max(self.player_rect.centerx // CHUNK_WIDTH, 0), self.world.chunk_count - 1)
+        wanted = range(max(center - STREAM_RADIUS, 0), min(center + STREAM_RADIUS + 1, self.world.chunk_count))
+        if len(self.chunks) == len(wanted) and all(index in self.chunks for index in wanted):
+            return
+        for index in [index for index in self.chunks if index not in wanted]:
+            self.evict_chunk(index)
+        for index in wanted:
+            if index not in self.chunks:
+                self.load_chunk(index)
+        self.ground_cache.clear()
+
+    def load_chunk(self, index):
+        chunk = self.chunks[index] = self.world.chunk(index)
+        for slot, plat in enumerate(chunk["platforms"]):
+            self.platforms[index, slot] = plat
+            self.platform_grid.insert((index, slot), plat)
+        # Coins picked up earlier in the run stay gone; the rest keep the type
+        # rolled when the chunk first loaded.
+        coin_types = self.coin_types
+        for slot, rect in enumerate(chunk["collectibles"]):
+            key = index, slot
+            if key not in self.collected:
+                coin = self.stage_coins[key] = self.new_coin(rect, self.stage_blue_odds, coin_types.get(key))
+                coin_types[key] = coin.type
+            self.coin_grid.insert(key, rect)
+
+    def evict_chunk(self, index):
+        chunk = self.chunks.pop(index)
+        for slot, plat in enumerate(chunk["platforms"]):
+            del self.platforms[index, slot]
+            self.platform_grid.remove((index, slot), plat)
+        for slot, rect in enumerate(chunk["collectibles"]):
+            self.coin_grid.remove((index, slot), rect)
+            coin = self.stage_coins.pop((index, slot), None)
+            if coin is not None:
+                self.spare_coins.append(coin)
+            else:
+                self.collected.add((index, slot))
+        self.world.recycle(chunk)
+
+    def ms_to_ticks(self, ms):
+        return ms * TICK_RATE // 1000
+
+    def step(self, inputs):
+        """Advance one tick with ``inputs`` held; return this tick's events.
+
+        Events are names of things the front end may want to react to
+        ("jump", "coin", "level"). ``game_over`` is set when a clone
+        catches the player.
+        """
+        prof = self.profiler
+        self.tick += 1
+        self.events = []
+        self.last_player_pos = self.player_rect.topleft
+        self.apply_input(inputs)
+        if prof:
+            prof.mark("input")
+        self.apply_physics()
+        if self.world is not None:
+            self.stream()  # platforms under the player must be loaded before collision
+        if prof:
+            prof.mark("physics")
+        self.collide_platforms(inputs)
+        if prof:
+            prof.mark("platform_collision")
+        self.update_clones()
+        if prof:
+            prof.mark("clone_update")
+        self.collect_coins()
+        if prof:
+            prof.mark("coin_collision")
+        self.advance_stage()
+        if prof:
+            prof.mark("stage_transition")
+        self.animate()
+        if prof:
+            prof.mark("animation")
+        return self.events
+
+    def apply_input(self, inputs):
+        player_rect = self.player_rect
+        moved_this_frame = False
+        if inputs & INPUT_LEFT:
+            player_rect.x -= player_speed
+            self.facing_right = False
+            moved_this_frame = True
+        if inputs & INPUT_RIGHT:
+            player_rect.x += player_speed
+            self.facing_right = True
+            moved_this_frame = True
+
+        # --- Wrap around screen (or world) edges ---
+        if player_rect.right < 0:
+            player_rect.left = self.world_width
+        elif player_rect.left > self.world_width:
+            player_rect.right = 0
+
+        if inputs & INPUT_JUMP and self.on_ground:
+            self.events.append("jump")
+            self.player_vel_y = jump_velocity
+            self.on_ground = False
+            moved_this_frame = True
+
+        if moved_this_frame:
+            self.player_moved = True
+            if self.player_move_tick is None:
+                self.player_move_tick = self.tick
+
+    def apply_physics(self):
+        self.player_vel_y += gravity
+        self.player_rect.y += self.player_vel_y
+
+    def collide_platforms(self, inputs):
+        player_rect = self.player_rect
+        platforms = self.platforms
+        grid = self.platform_grid
+        self.on_ground = False
+        candidates = grid.query(player_rect)
+        k = 0
+        while k < len(candidates):
+            i = candidates[k]
+            k += 1
+            plat = platforms[i]
+            if player_rect.colliderect(plat) and self.player_vel_y >= 0:
+                if plat.top < HEIGHT - 60 and inputs & INPUT_DOWN:
+                    continue
+                player_rect.bottom = plat.top
+                self.player_vel_y = 0
+                self.on_ground = True
+                # The player moved up; later platforms are checked against the new position.
+                candidates = [j for j in grid.query(player_rect) if j > i]
+                k = 0
+
+    def spawn_clone(self, delay_frames):
+        player_trail = self.trail
+        trail_xs, trail_ys = player_trail.window(delay_frames)
+        if trail_xs:
+            init_x, init_y = trail_xs[0], trail_ys[0]
+        else:
+            init_x, init_y = self.player_rect.x, self.player_rect.y
+        if len(trail_xs) >= 2:
+            fx = trail_xs[-1] - trail_xs[0]
+            initial_facing = True if fx >= 0 else False
+        else:
+            initial_facing = self.facing_right
+        if self.spare_clones:
+            clone = self.spare_clones.pop()
+            clone.place(init_x, init_y, delay_frames, initial_facing, self.tick)
+        else:
+            clone = Clone(init_x, init_y, delay_frames, initial_facing, self.tick)
+        self.clones.append(clone)
+
+    def update_clones(self):
+        player_rect = self.player_rect
+        player_trail = self.trail
+
+        # --- Trail recording ---
+        if self.player_moved:
+            player_trail.append(player_rect.x, player_rect.y)
+
+        # --- Clone spawning ---
+        if (self.player_moved and len(self.clones) == 0
+                and self.tick - self.player_move_tick >= self.ms_to_ticks(self.clone_spawn_delay)):
+            self.spawn_clone(clone_delay_frames)
+
+        if self.score // self.clone_score_step > self.last_threshold and len(self.clones) > 0:
+            self.last_threshold = self.score // self.clone_score_step
+            self.spawn_clone(min(clone_delay_frames * (len(self.clones) + 1), trail_capacity - 1))
+
+        # --- Update clones ---
+        trail_len = len(player_trail)
+        trail_at = player_trail.at
+        tick = self.tick
+        can_catch = not self.invincible and self.clones_catch_player
+        for clone in self.clones:
+            rect = clone.rect
+            clone.last_pos = rect.topleft
+            delay = clone.delay
+            if tick - clone.spawn_tick < delay:
+                delay -= 1
+            if trail_len > delay:
+                bx, by = trail_at(delay)
+                dx = bx - rect.x
+                clone.last_dy = by - rect.y
+                rect.topleft = bx, by
+                if dx > 0:
+                    clone.facing_right = True
+                elif dx < 0:
+                    clone.facing_right = False
+            if can_catch and player_rect.colliderect(rect):
+                self.game_over = True
+
+    def collect_coins(self):
+        # --- Update coin animation ---
+        self.coin_frame_timer += 1
+        if self.coin_frame_timer >= coin_frame_speed:
+            self.coin_frame_timer = 0
+            self.coin_frame_index = (self.coin_frame_index + 1) % COIN_FRAMES
+
+        # --- Collectibles collision ---
+        stage_coins = self.stage_coins
+        for key in self.coin_grid.query(self.player_rect):
+            coin = stage_coins.get(key)
+            if coin is not None and self.player_rect.colliderect(coin.rect):
+                self.events.append("coin")
+                if coin.type == "blue":
+                    self.invincible = True
+                    self.invincible_timer = self.tick
+                else:
+                    self.score += 1
+                del stage_coins[key]  # also drops it from collectibles, keeping the draw order
+                self.spare_coins.append(coin)
+
+        # --- Update invincibility ---
+        if self.invincible:
+            if self.tick - self.invincible_timer >= self.ms_to_ticks(self.invincible_duration):
+                self.invincible = False
+
+    def advance_stage(self):
+        if not self.collectibles and self.world is None:
+            self.events.append("level")
+            stage_index = self.rng.choice(other_stages[self.last_stage_index])
+            self.last_stage_index = stage_index
+            self.load_stage(stage_index, self.stage_blue_odds)
+
+    def standing(self, rect):
+        """True if ``rect`` rests on a platform (its top within 6px above the feet)."""
+        platforms = self.platforms
+        for i in self.platform_grid.query(rect):
+            plat = platforms[i]
+            if rect.colliderect(plat) and abs(rect.bottom - plat.top) <= 6:
+                return True
+        return False
+
+    def animate(self):
+        # --- Player ---
+        if not self.on_ground:
+            self.current_frame = JUMP_UP_FRAME if self.player_vel_y < 0 else JUMP_DOWN_FRAME
+        else:
+            self.frame_timer += 1
+            if self.frame_timer >= 5:
+                self.frame_timer = 0
+                self.frame_index = (self.frame_index + 1) % RUN_FRAMES
+            self.current_frame = self.frame_index
+
+        # --- Clones ---
+        ground_cache = self.ground_cache
+        for clone in self.clones:
+            rect = clone.rect
+            pos = (rect.x, rect.bottom)
+            clone_on_ground = ground_cache.get(pos)
+            if clone_on_ground is None:
+                clone_on_ground = ground_cache[pos] = self.standing(rect)
+            if not clone_on_ground:
+                clone.frame = JUMP_UP_FRAME if clone.last_dy < 0 else JUMP_DOWN_FRAME
+            else:
+                clone.frame_timer += 1
+                if clone.frame_timer >= 5:
+                    clone.frame_timer = 0
+                    clone.frame_index = (clone.frame_index + 1) % RUN_FRAMES
+                clone.frame = clone.frame_index
+
+
+if __name__ == "__main__":
+    # Headless throughput check: python simulation.py [ticks]
+    import time
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    policy = random.Random(0)
+    sim = Simulation(seed=0)
+    runs = 1
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.step(policy.choice((INPUT_RIGHT, INPUT_RIGHT | INPUT_JUMP, INPUT_LEFT, INPUT_LEFT | INPUT_JUMP, 0)))
+        if sim.game_over or sim.player_rect.top > HEIGHT:  # caught, or fell through the wrap gap
+            sim.reset(seed=runs)
+            runs += 1
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} ticks in {elapsed:.2f}s ({ticks / elapsed:.0f} ticks/s), {runs} runs")